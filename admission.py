@@ -0,0 +1,141 @@
+"""
+Admission Control - Bounded, prioritized queue in front of the agent
+Rejects fast (429 / 503 + Retry-After) instead of letting every request time out
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from metrics import Counter, Gauge, Histogram
+
+# Settings
+MAX_CONCURRENT_QUERIES = int(os.getenv("MAX_CONCURRENT_QUERIES", "200"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+
+# Lanes in priority order, with their max queue length
+LANES = {
+    "interactive": int(os.getenv("ADMISSION_MAX_QUEUE_INTERACTIVE", "500")),
+    "batch": int(os.getenv("ADMISSION_MAX_QUEUE_BATCH", "2000")),
+}
+
+# Metrics
+QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for a slot", ["lane"])
+ACTIVE = Gauge("admission_active", "Agent runs holding a slot")
+WAIT_TIME = Histogram("admission_wait_seconds", "Time spent waiting for a slot", ["lane"])
+REJECTED = Counter("admission_rejected_total", "Requests rejected by admission control",
+                   ["lane", "reason"])
+
+
+class Rejected(Exception):
+    """Request not admitted; maps to an HTTP error with Retry-After"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limits concurrent agent runs and queues the rest by lane priority.
+
+    - Up to max_concurrent runs hold a slot at once
+    - Waiting requests queue per lane (bounded); when a slot frees up,
+      the oldest waiter of the highest-priority lane gets it
+    - Full queue -> 429, waited longer than max_wait -> 503
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_QUERIES,
+                 max_wait: float = ADMISSION_MAX_WAIT_SECONDS, lanes: dict = None):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.lanes = dict(lanes or LANES)
+        self.active = 0
+        self._waiters = {lane: deque() for lane in self.lanes}
+        # Moving average of how long a run holds its slot, for Retry-After
+        self._avg_service = 1.0
+
+    def queued(self, lane: str = None) -> int:
+        if lane is not None:
+            return len(self._waiters[lane])
+        return sum(len(w) for w in self._waiters.values())
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queued request would get a slot"""
+        backlog = (self.queued() + 1) / max(self.max_concurrent, 1)
+        return max(1, round(backlog * self._avg_service))
+
+    def check(self, lane: str):
+        """Raise Rejected right away if the lane's queue is already full"""
+        if self.active >= self.max_concurrent and self.queued(lane) >= self.lanes[lane]:
+            REJECTED.inc(lane, "queue_full")
+            raise Rejected(429, f"Server busy ({lane} queue full)", self.retry_after())
+
+    async def acquire(self, lane: str = "interactive"):
+        """Wait for a slot, or raise Rejected"""
+        if self.active < self.max_concurrent and self.queued() == 0:
+            self.active += 1
+            ACTIVE.set(value=self.active)
+            WAIT_TIME.observe(lane, value=0)
+            return
+
+        self.check(lane)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        QUEUE_DEPTH.set(lane, value=self.queued(lane))
+        started = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(lane, waiter)
+            REJECTED.inc(lane, "wait_timeout")
+            raise Rejected(503, "Timed out waiting for capacity", self.retry_after())
+        except asyncio.CancelledError:
+            self._abandon(lane, waiter)
+            raise
+        finally:
+            WAIT_TIME.observe(lane, value=time.perf_counter() - started)
+
+    def _abandon(self, lane: str, waiter):
+        """Drop a waiter that gave up; pass its slot on if it was just granted one"""
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters[lane].remove(waiter)
+            except ValueError:
+                pass
+            QUEUE_DEPTH.set(lane, value=self.queued(lane))
+
+    def release(self, service_time: float = None):
+        """Free a slot, handing it straight to the next waiter if any"""
+        if service_time is not None:
+            self._avg_service = 0.9 * self._avg_service + 0.1 * service_time
+
+        for lane, waiters in self._waiters.items():
+            while waiters:
+                waiter = waiters.popleft()
+                QUEUE_DEPTH.set(lane, value=len(waiters))
+                if not waiter.done():
+                    # Slot moves to the waiter, active count unchanged
+                    waiter.set_result(None)
+                    return
+
+        self.active -= 1
+        ACTIVE.set(value=self.active)
+
+    @asynccontextmanager
+    async def slot(self, lane: str = "interactive"):
+        """async with admission.slot("batch"): ..."""
+        await self.acquire(lane)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
@@ -0,0 +1,170 @@
+"""
+Answer Cache - Reuse agent answers for repeated questions
+Exact tier: in-process LRU keyed by normalized question + tool-set fingerprint
+Semantic tier (optional): ChromaDB similarity search over past questions
+"""
+
+import os
+import re
+import time
+import hashlib
+from ttl_cache import TTLCache
+
+# Settings
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SWEEP_SECONDS = float(os.getenv("SEMANTIC_CACHE_SWEEP_SECONDS", "300"))  # expired entry cleanup
+
+# How long an answer may be reused, by tool used to produce it (seconds).
+# An answer lives as long as the shortest TTL among the tools it used.
+# 0 = never cache (side effects or always-fresh data).
+TOOL_TTLS = {
+    "get_weather": 600,
+    "mcp_weather": 600,
+    "get_weather_batch": 600,
+    "mcp_weather_batch": 600,
+    "google_search": 3600,
+    "web_scraper": 3600,
+    "scrape_many": 3600,
+    "search_wikipedia": 3 * 86400,
+    "summarize_text": 86400,
+    "mcp_calculator": 30 * 86400,
+    "send_email": 0,
+    "mcp_send_email": 0,
+    "email_status": 0,
+    "mcp_email_status": 0,
+    "store_memory": 0,
+    "recall_memory": 0,
+    "list_all_memories": 0,
+    "clear_all_memories": 0,
+    "mcp_store_memory": 0,
+    "mcp_recall_memory": 0,
+    "mcp_list_all_memories": 0,
+    "mcp_clear_all_memories": 0,
+}
+DEFAULT_TTL = 3600        # answers that used no tools
+UNKNOWN_TOOL_TTL = 600    # tools missing from TOOL_TTLS
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+
+def tools_fingerprint(tools) -> str:
+    """Short stable hash of the tool set (names + descriptions)"""
+    digest = hashlib.sha256()
+    for t in sorted(tools, key=lambda t: t.name):
+        digest.update(t.name.encode())
+        digest.update(t.description.encode())
+    return digest.hexdigest()[:16]
+
+
+def answer_ttl(tools_used) -> float:
+    """TTL for an answer produced with the given tool names"""
+    if not tools_used:
+        return DEFAULT_TTL
+    return min(TOOL_TTLS.get(name, UNKNOWN_TOOL_TTL) for name in tools_used)
+
+
+class AnswerCache:
+    """Two-tier answer cache in front of the agent"""
+
+    def __init__(self, tools, max_size: int = ANSWER_CACHE_SIZE,
+                 semantic: bool = SEMANTIC_CACHE_ENABLED,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.fingerprint = tools_fingerprint(tools)
+        self.exact = TTLCache(max_size=max_size, default_ttl=DEFAULT_TTL)
+        self.semantic = semantic
+        self.threshold = threshold
+        self.semantic_hits = 0
+        self.semantic_misses = 0
+        self._collection = None
+        self._last_sweep = time.time()
+
+    def _key(self, question: str) -> str:
+        return f"{self.fingerprint}:{normalize_question(question)}"
+
+    def _semantic_collection(self):
+        """ChromaDB collection for past questions (reuses the memory client)"""
+        if self._collection is None:
+            from tools import get_memory_manager
+
+            self._collection = get_memory_manager().client.get_or_create_collection(
+                name="answer_cache",
+                metadata={"hnsw:space": "cosine"}
+            )
+        return self._collection
+
+    def get(self, question: str):
+        """Return a cached answer or None. Semantic lookups block (ChromaDB)."""
+        answer = self.exact.get(self._key(question))
+        if answer is not None or not self.semantic:
+            return answer
+
+        collection = self._semantic_collection()
+        if collection.count() == 0:
+            self.semantic_misses += 1
+            return None
+
+        # Expired entries are filtered out, so they can't hide a valid one behind them
+        results = collection.query(
+            query_texts=[normalize_question(question)],
+            n_results=1,
+            where={"$and": [{"fingerprint": self.fingerprint},
+                            {"expires_at": {"$gt": time.time()}}]}
+        )
+
+        if results["ids"] and results["ids"][0]:
+            similarity = 1 - results["distances"][0][0]
+            if similarity >= self.threshold:
+                self.semantic_hits += 1
+                return results["metadatas"][0][0]["answer"]
+
+        self.semantic_misses += 1
+        return None
+
+    def sweep(self) -> int:
+        """Delete expired semantic entries -> how many were removed"""
+        self._last_sweep = time.time()
+        collection = self._semantic_collection()
+        expired = collection.get(where={"expires_at": {"$lte": time.time()}}, include=[])["ids"]
+        if expired:
+            collection.delete(ids=expired)
+        return len(expired)
+
+    def set(self, question: str, answer: str, tools_used=()):
+        """Cache an answer for as long as the tools it used allow"""
+        ttl = answer_ttl(tools_used)
+        if ttl <= 0:
+            return
+
+        self.exact.set(self._key(question), answer, ttl=ttl)
+
+        if self.semantic:
+            if time.time() - self._last_sweep >= SEMANTIC_CACHE_SWEEP_SECONDS:
+                self.sweep()
+            normalized = normalize_question(question)
+            self._semantic_collection().upsert(
+                ids=[hashlib.sha256(self._key(question).encode()).hexdigest()],
+                documents=[normalized],
+                metadatas=[{
+                    "fingerprint": self.fingerprint,
+                    "answer": answer,
+                    "expires_at": time.time() + ttl
+                }]
+            )
+
+    def stats(self) -> dict:
+        """Hit / miss counters for both tiers"""
+        return {
+            "exact": self.exact.stats(),
+            "semantic": {
+                "enabled": self.semantic,
+                "hits": self.semantic_hits,
+                "misses": self.semantic_misses
+            }
+        }
@@ -2,10 +2,29 @@
 FastAPI Backend for Multi-Tool Agent System
 """
 
-from fastapi import FastAPI, HTTPException
+import os
+import json
+import time
+import asyncio
+from contextlib import nullcontext
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from pydantic import BaseModel
-from gemini_service import create_agent, TOOLS
+from typing import List, Optional
+from gemini_service import create_agent, warmup, summarize_history, TOOLS
+from answer_cache import AnswerCache, ANSWER_CACHE_ENABLED
+import metrics
+from metrics import MetricsCallbackHandler
+from admission import AdmissionController, Rejected
+from sessions import SessionStore, trim_history, HISTORY_SUMMARIZE
+from tool_router import ToolRouter, TOOL_ROUTER_ENABLED
+from fast_path import FastPath, FAST_PATH_ENABLED
+import tracing
+from tracing import start_trace
+from budgets import Budget
+import http_client
+import outbox
 
 app = FastAPI(title="Multi-Tool Agent API")
 
@@ -18,17 +37,472 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Concurrency settings
+# Agent runs are async, so a worker can hold many in-flight questions.
+# Admission control caps how many run at once (MAX_CONCURRENT_QUERIES) and
+# queues the rest per lane: interactive requests before batch items.
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "32"))
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+# Console output of every agent step; off in the server (see GET /traces)
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "false").lower() == "true"
+
+admission = AdmissionController()
+
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, exc: Rejected):
+    """Overload: tell the client when to come back"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Tool routing: bind only the tools relevant to each question (None when disabled)
+tool_router = ToolRouter(TOOLS) if TOOL_ROUTER_ENABLED else None
+
+async def route_tools(question: str, chat_history: list = None):
+    """Route for the question, or None to bind every tool"""
+    if tool_router is None:
+        return None
+    # Embedding the question blocks
+    return await asyncio.to_thread(tool_router.route, question, chat_history)
+
+# Answer cache for repeated questions (None when disabled)
+answer_cache = AnswerCache(TOOLS) if ANSWER_CACHE_ENABLED else None
+
+def read_cache_counters():
+    """Answer cache counters for /metrics"""
+    if answer_cache is None:
+        return {}
+    stats = answer_cache.stats()
+    return {
+        ("exact", "hit"): stats["exact"]["hits"],
+        ("exact", "miss"): stats["exact"]["misses"],
+        ("semantic", "hit"): stats["semantic"]["hits"],
+        ("semantic", "miss"): stats["semantic"]["misses"],
+    }
+
+metrics.CallbackMetric(
+    "answer_cache_lookups_total", "Answer cache lookups by tier and result",
+    "counter", ["tier", "result"], read_cache_counters
+)
+metrics.CallbackMetric(
+    "answer_cache_hit_ratio", "Exact-tier answer cache hit ratio", "gauge", [],
+    lambda: {(): answer_cache.stats()["exact"]["hit_ratio"]} if answer_cache else {}
+)
+
+# Fast path: trivial math / weather questions skip the LLM (None when disabled)
+fast_path = FastPath(TOOLS) if FAST_PATH_ENABLED else None
+
+metrics.CallbackMetric(
+    "fast_path_hit_ratio", "Share of questions answered by the fast path", "gauge", [],
+    lambda: {(): fast_path.stats()["hit_ratio"]} if fast_path else {}
+)
+
+async def fast_path_answer(question: str, lane: str = "interactive",
+                           limits: "BudgetLimits" = None):
+    """
+    Answer from a direct tool call -> (answer, usage), or None if the agent is needed.
+    The call holds an admission slot and counts against the request's budget.
+    Raises Rejected if admission control turns the request away.
+    """
+    if fast_path is None:
+        return None
+    budget = Budget.from_request(**(limits.model_dump() if limits else {}))
+    answer = await fast_path.answer(question, slot=admission.slot(lane), budget=budget)
+    return None if answer is None else (answer, budget.usage())
+
+# Conversation sessions (server-side history, LRU + idle TTL)
+session_store = SessionStore()
+
 # Request model
+class BudgetLimits(BaseModel):
+    """Per-request limits; each is capped at the server's BUDGET_* setting"""
+    max_iterations: Optional[int] = None
+    max_seconds: Optional[float] = None
+    max_input_tokens: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+
 class QueryRequest(BaseModel):
     question: str
+    session_id: Optional[str] = None  # continue a conversation
+    budget: Optional[BudgetLimits] = None
 
 # Response model
+class Usage(BaseModel):
+    iterations: int
+    llm_calls: int
+    tool_calls: int
+    input_tokens: int
+    output_tokens: int
+    seconds: float
+    stopped: Optional[str] = None  # budget that cut the run short
+
 class QueryResponse(BaseModel):
     answer: str
     success: bool
+    cached: bool = False
+    session_id: Optional[str] = None
+    usage: Optional[Usage] = None  # None for cached / fast-path answers
+
+# Batch models
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+    max_parallel: Optional[int] = None  # capped at BATCH_MAX_PARALLEL
+    stream: bool = False                # NDJSON lines as items complete
+
+class BatchItemResult(BaseModel):
+    index: int
+    answer: Optional[str] = None
+    success: bool
+    cached: bool = False
+    session_id: Optional[str] = None
+    usage: Optional[Usage] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+async def run_until_disconnected(http_request: Request, coro):
+    """
+    Run a coroutine, cancelling it if the client goes away.
+
+    Polls the connection while the coroutine runs so an abandoned request
+    stops its LLM / tool loop instead of finishing work nobody will read.
+    """
+    task = asyncio.ensure_future(coro)
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def cache_lookup(question: str):
+    """Cached answer for a question, or None"""
+    if answer_cache is None:
+        return None
+    if answer_cache.semantic:
+        # Semantic tier queries ChromaDB, keep it off the event loop
+        return await asyncio.to_thread(answer_cache.get, question)
+    return answer_cache.get(question)
+
+async def cache_store(question: str, answer: str, tools_used):
+    """Remember an answer, with a TTL based on the tools it used"""
+    if answer_cache is None:
+        return
+    if answer_cache.semantic:
+        await asyncio.to_thread(answer_cache.set, question, answer, tools_used)
+    else:
+        answer_cache.set(question, answer, tools_used)
+
+def get_session(session_id: str):
+    """Session for an id from POST /sessions; 404 if unknown or expired"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown or expired session '{session_id}'. Start one with POST /sessions"
+        )
+    return session
+
+async def ask_agent(question: str, lane: str = "interactive", session_id: str = None,
+                    limits: BudgetLimits = None) -> dict:
+    """
+    Answer one question, optionally as the next turn of a session.
+    Returns {"answer": str, "cached": bool, "usage": dict | None, "session_id": str | None}
+    Raises Rejected if admission control turns the request away, and a 404
+    HTTPException if session_id is unknown or expired.
+    """
+    if not session_id:
+        return await run_agent(question, lane, limits=limits)
+    
+    session = get_session(session_id)
+    async with session.lock:
+        result = await run_agent(question, lane, session.messages(), limits)
+        summarize = summarize_history if HISTORY_SUMMARIZE else None
+        await trim_history(session, question, result["answer"], summarize)
+    
+    return {**result, "session_id": session_id}
+
+async def run_agent(question: str, lane: str, chat_history: list = None,
+                    limits: BudgetLimits = None) -> dict:
+    """
+    Answer one question, from the cache or through a fresh agent executor.
+    Answers that depend on conversation history are not cached.
+    The run stops early (partial answer) when it reaches a budget limit.
+    """
+    if not chat_history:
+        cached = await cache_lookup(question)
+        if cached is not None:
+            metrics.REQUESTS.inc("cached")
+            return {"answer": cached, "cached": True}
+    
+    # One tool call, no LLM
+    fast = await fast_path_answer(question, lane, limits)
+    if fast is not None:
+        metrics.REQUESTS.inc("fast_path")
+        answer, usage = fast
+        return {"answer": answer, "cached": False, "usage": usage}
+    
+    route = await route_tools(question, chat_history)
+    
+    async with admission.slot(lane):
+        # New executor per request: concurrent runs never share executor state
+        budget = Budget.from_request(**(limits.model_dump() if limits else {}))
+        agent = create_agent(route.tools if route else TOOLS,
+                             return_intermediate_steps=True, verbose=AGENT_VERBOSE,
+                             budget=budget, max_execution_time=budget.max_seconds)
+        handler = MetricsCallbackHandler()
+        trace = start_trace("query", question=question[:200], lane=lane)
+        callbacks = [handler, budget] + ([trace] if trace else [])
+        started = time.perf_counter()
+        
+        try:
+            with trace or nullcontext():
+                result = await agent.ainvoke(
+                    {"input": question, "chat_history": chat_history or []},
+                    config={"callbacks": callbacks}
+                )
+        except Exception:
+            metrics.REQUESTS.inc("error")
+            raise
+        finally:
+            metrics.REQUEST_LATENCY.observe(value=time.perf_counter() - started)
+            metrics.ITERATIONS.observe(value=handler.llm_calls)
+            if route:
+                route.record(handler.llm_calls)
+    
+    metrics.REQUESTS.inc("ok")
+    # Partial answers (budget ran out) are not worth caching
+    if not chat_history and not budget.stopped:
+        tools_used = [action.tool for action, _ in result['intermediate_steps']]
+        await cache_store(question, result['output'], tools_used)
+    return {"answer": result['output'], "cached": False, "usage": budget.usage()}
+
+async def run_batch(batch: BatchQueryRequest):
+    """
+    Run every query in a batch concurrently, yielding results as they complete.
+    
+    All items go through the same cached agent runnable and module-level
+    tools, so clients and caches are shared across the whole batch.
+    """
+    limit = min(batch.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL)
+    batch_semaphore = asyncio.Semaphore(max(limit, 1))
+    
+    async def run_item(index: int, query: QueryRequest) -> BatchItemResult:
+        async with batch_semaphore:
+            try:
+                result = await ask_agent(query.question, lane="batch",
+                                         session_id=query.session_id, limits=query.budget)
+                return BatchItemResult(index=index, success=True, **result)
+            except Exception as e:
+                return BatchItemResult(index=index, success=False, error=str(e))
+    
+    tasks = [asyncio.ensure_future(run_item(i, q)) for i, q in enumerate(batch.queries)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def chunk_text(chunk) -> str:
+    """Extract the text part of a streamed LLM message chunk"""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    
+    # Gemini may stream a list of content parts
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content
+    )
 
-# Initialize agent
-agent = create_agent()
+async def stream_agent_events(question: str, session_id: str = None, limits: BudgetLimits = None):
+    """
+    Run one question and yield SSE events as the agent works:
+    - token: LLM output text as it is generated
+    - tool_start / tool_end: tool name, args, elapsed ms
+    - final: the agent's answer (and usage)
+    - error: run failed
+    
+    If the client disconnects, the generator is cancelled and the run stops.
+    """
+    if not session_id:
+        async for event in stream_run(question, limits=limits):
+            yield event
+        return
+    
+    session = session_store.get(session_id)
+    if session is None:
+        # Expired between the request check and the stream starting
+        yield sse_event("error", {"detail": f"Unknown or expired session '{session_id}'"})
+        return
+    
+    async with session.lock:
+        outcome = {}
+        async for event in stream_run(question, session.messages(), outcome, limits):
+            yield event
+        
+        if "answer" in outcome:
+            summarize = summarize_history if HISTORY_SUMMARIZE else None
+            await trim_history(session, question, outcome["answer"], summarize)
+
+async def stream_run(question: str, chat_history: list = None, outcome: dict = None,
+                     limits: BudgetLimits = None):
+    """SSE events for one agent run; the final answer is also put in outcome"""
+    outcome = {} if outcome is None else outcome
+    
+    if not chat_history:
+        cached = await cache_lookup(question)
+        if cached is not None:
+            metrics.REQUESTS.inc("cached")
+            outcome["answer"] = cached
+            yield sse_event("final", {"answer": cached, "cached": True})
+            return
+    
+    try:
+        fast = await fast_path_answer(question, limits=limits)
+    except Rejected as e:
+        yield sse_event("error", {"detail": e.detail, "retry_after": e.retry_after})
+        return
+    if fast is not None:
+        metrics.REQUESTS.inc("fast_path")
+        answer, usage = fast
+        outcome["answer"] = answer
+        yield sse_event("final", {"answer": answer, "cached": False, "fast_path": True,
+                                  "usage": usage})
+        return
+    
+    route = await route_tools(question, chat_history)
+    
+    try:
+        await admission.acquire("interactive")
+    except Rejected as e:
+        yield sse_event("error", {"detail": e.detail, "retry_after": e.retry_after})
+        return
+    
+    budget = Budget.from_request(**(limits.model_dump() if limits else {}))
+    agent = create_agent(route.tools if route else TOOLS, verbose=AGENT_VERBOSE,
+                         budget=budget, max_execution_time=budget.max_seconds)
+    handler = MetricsCallbackHandler()
+    trace = start_trace("stream", question=question[:200], lane="interactive")
+    callbacks = [handler, budget] + ([trace] if trace else [])
+    if trace:
+        trace.start()
+    started = time.perf_counter()
+    tool_started = {}
+    tools_used = []
+    error = None
+    
+    try:
+        events = agent.astream_events(
+            {"input": question, "chat_history": chat_history or []},
+            config={"callbacks": callbacks},
+            version="v2"
+        )
+        async for event in events:
+            kind = event["event"]
+            
+            if kind == "on_chat_model_stream":
+                text = chunk_text(event["data"]["chunk"])
+                if text:
+                    yield sse_event("token", {"text": text})
+            
+            elif kind == "on_tool_start":
+                tool_started[event["run_id"]] = time.perf_counter()
+                tools_used.append(event["name"])
+                yield sse_event("tool_start", {
+                    "tool": event["name"],
+                    "args": event["data"].get("input")
+                })
+            
+            elif kind in ("on_tool_end", "on_tool_error"):
+                tool_began = tool_started.pop(event["run_id"], time.perf_counter())
+                yield sse_event("tool_end", {
+                    "tool": event["name"],
+                    "elapsed_ms": round((time.perf_counter() - tool_began) * 1000, 1),
+                    "error": kind == "on_tool_error"
+                })
+            
+            # Top-level chain finished: that's the agent's answer
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"].get("output") or {}
+                answer = output.get("output", "")
+                outcome["answer"] = answer
+                if not chat_history and not budget.stopped:
+                    await cache_store(question, answer, tools_used)
+                metrics.REQUESTS.inc("ok")
+                yield sse_event("final", {"answer": answer, "cached": False, "usage": budget.usage()})
+    
+    except Exception as e:
+        metrics.REQUESTS.inc("error")
+        error = e
+        yield sse_event("error", {"detail": str(e)})
+    
+    finally:
+        if trace:
+            trace.finish(error=str(error) if error else None)
+        elapsed = time.perf_counter() - started
+        admission.release(elapsed)
+        metrics.REQUEST_LATENCY.observe(value=elapsed)
+        metrics.ITERATIONS.observe(value=handler.llm_calls)
+        if route:
+            route.record(handler.llm_calls)
+
+# Warmup state
+# Heavy dependencies load on first use; /ready reports 503 until warmup ran.
+warmup_state = {"status": "cold", "error": None, "seconds": None}
+warmup_lock = asyncio.Lock()
+
+async def run_warmup():
+    """Run warmup once (in a thread, it blocks), recording the outcome"""
+    async with warmup_lock:
+        if warmup_state["status"] == "ready":
+            return
+        
+        warmup_state["status"] = "warming"
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(warmup)
+            if tool_router is not None:
+                await asyncio.to_thread(tool_router.load)
+            warmup_state.update(status="ready", error=None)
+        except Exception as e:
+            warmup_state.update(status="failed", error=str(e))
+        finally:
+            warmup_state["seconds"] = round(time.perf_counter() - started, 3)
+
+@app.on_event("startup")
+async def warmup_on_startup():
+    """Optionally warm up in the background as soon as the server starts"""
+    if WARMUP_ON_STARTUP:
+        asyncio.create_task(run_warmup())
+
+@app.on_event("startup")
+async def resume_outbox():
+    """Deliver emails an earlier run left queued"""
+    await asyncio.to_thread(outbox.resume)
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled async HTTP connections"""
+    await http_client.aclose()
 
 @app.get("/")
 def root():
@@ -38,26 +512,150 @@ def root():
         "available_tools": [t.name for t in TOOLS]
     }
 
+@app.post("/warmup")
+async def warmup_agent():
+    """Load LLM client, tool libraries and MCP servers now instead of on first query"""
+    await run_warmup()
+    if warmup_state["status"] != "ready":
+        raise HTTPException(status_code=500, detail=warmup_state["error"])
+    return warmup_state
+
+@app.get("/ready")
+def readiness():
+    """Readiness probe: 200 only once warmup has completed"""
+    if warmup_state["status"] != "ready":
+        return JSONResponse(status_code=503, content=warmup_state)
+    return warmup_state
+
 @app.post("/query", response_model=QueryResponse)
-def query_agent(request: QueryRequest):
+async def query_agent(request: QueryRequest, http_request: Request):
     """
     Send a query to the agent
-    
+
     Example:
     POST /query
     {
         "question": "What is 25 * 4?"
     }
+
+    Add "session_id" (from POST /sessions) to continue a conversation;
+    the server keeps the history. An unknown or expired id is a 404.
+    
+    Optional "budget" ({"max_iterations", "max_seconds", "max_input_tokens",
+    "max_output_tokens"}) lowers the server's limits for this request. The
+    response's "usage" reports what the run actually used.
     """
     try:
-        result = agent.invoke({"input": request.question})
+        result = await run_until_disconnected(
+            http_request, ask_agent(request.question, session_id=request.session_id,
+                                    limits=request.budget)
+        )
         return QueryResponse(
-            answer=result['output'],
-            success=True
+            success=True,
+            **result
         )
+    except (HTTPException, Rejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/batch")
+async def query_agent_batch(batch: BatchQueryRequest, http_request: Request):
+    """
+    Send many queries in one call; they run concurrently
+
+    Example:
+    POST /query/batch
+    {
+        "queries": [{"question": "What is 25 * 4?"}, {"question": "Weather in Paris?"}],
+        "max_parallel": 8,
+        "stream": false
+    }
+
+    With "stream": true the response is NDJSON, one result per line in
+    completion order. Otherwise results are returned in request order.
+    """
+    if batch.stream:
+        async def ndjson():
+            async for item in run_batch(batch):
+                yield item.model_dump_json() + "\n"
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    async def collect():
+        return [item async for item in run_batch(batch)]
+    
+    results = await run_until_disconnected(http_request, collect())
+    results.sort(key=lambda item: item.index)
+    succeeded = sum(1 for item in results if item.success)
+    
+    return BatchQueryResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
+
+@app.post("/query/stream")
+async def query_agent_stream(request: QueryRequest):
+    """
+    Send a query to the agent and stream progress as server-sent events
+
+    Example:
+    POST /query/stream
+    {
+        "question": "What's the weather in London?"
+    }
+
+    Events: token, tool_start, tool_end, final, error
+    """
+    # Reject before the 200 + stream headers go out if the queue is full
+    # or the session doesn't exist
+    admission.check("interactive")
+    if request.session_id:
+        get_session(request.session_id)
+    
+    return StreamingResponse(
+        stream_agent_events(request.question, request.session_id, request.budget),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/sessions")
+def create_session():
+    """Start a conversation; pass the returned session_id with each /query"""
+    return {"session_id": session_store.create().id}
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    """Forget a conversation's history"""
+    session_store.delete(session_id)
+    return {"deleted": session_id}
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Answer cache hit / miss counters"""
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus metrics: tool / LLM / MCP latency, tokens, cache hits"""
+    return metrics.render()
+
+@app.get("/traces")
+def list_traces(limit: int = 20):
+    """Most recent agent run traces (spans with timings and sizes), newest first"""
+    return {"traces": tracing.recent_traces(limit)}
+
+@app.get("/traces/{trace_id}")
+def get_trace(trace_id: str):
+    """One trace by id"""
+    trace = tracing.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
 @app.get("/tools")
 def list_tools():
     """List all available tools"""
@@ -69,4 +667,4 @@ def list_tools():
             }
             for t in TOOLS
         ]
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,119 @@
+"""
+Scraper Benchmark - Full-tree BeautifulSoup vs streaming extraction
+Runs both over a corpus of saved pages (no network): time, peak memory,
+bytes parsed, and whether the extracted text matches.
+
+Usage:
+    python bench_scraper.py pages/*.html     # your saved pages
+    python bench_scraper.py                  # generated pages (20 KB - 8 MB)
+"""
+
+import sys
+import time
+import tracemalloc
+import scraper
+
+ROUNDS = 3
+
+
+def legacy_scrape(body: bytes, max_chars: int = scraper.SCRAPER_MAX_CHARS) -> str:
+    """The previous web_scraper: whole body -> BeautifulSoup tree -> all text"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(body, "html.parser")
+    for element in soup(list(scraper.SKIP_TAGS)):
+        element.decompose()
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    text = "\n".join(line for line in lines if line)
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return text
+
+
+def streaming_scrape(body: bytes, parser: str):
+    """scraper.extract_text over the body in network-sized chunks -> (text, bytes read)"""
+    size = scraper.SCRAPER_CHUNK_SIZE
+    read = 0
+
+    def chunks():
+        nonlocal read
+        for start in range(0, min(len(body), scraper.SCRAPER_MAX_BYTES), size):
+            chunk = body[start:start + size]
+            read += len(chunk)
+            yield chunk
+
+    return scraper.extract_text(chunks(), parser=parser), read
+
+
+def generated_corpus() -> dict:
+    """Article-like pages with boilerplate, from 20 KB to 8 MB"""
+    paragraph = ("<p>Python is a high-level, general-purpose programming language. "
+                 "Its design philosophy emphasizes code readability with the use of "
+                 "significant indentation &amp; dynamic typing.</p>\n")
+    head = ("<html><head><title>Article</title><style>body{margin:0}</style>"
+            "<script>var tracking = {};</script></head><body>\n"
+            "<header><a href='/'>Home</a></header><nav><ul><li>Menu</li></ul></nav>\n")
+    pages = {}
+    for kb in (20, 200, 1024, 8192):
+        count = kb * 1024 // len(paragraph)
+        body = head + "<main>\n" + paragraph * count + "</main><footer>(c)</footer></body></html>"
+        pages[f"generated-{kb}KB.html"] = body.encode()
+
+    # Encoding declared only in <meta>, odd line breaks and a <template>
+    pages["generated-latin1-meta.html"] = (
+        "<html><head><meta charset='iso-8859-1'><title>Caf\u00e9</title></head><body>"
+        "<p>caf\u00e9 na\u00efve\r\nsecond line\x0cthird line</p>"
+        "<template><p>not rendered</p></template></body></html>"
+    ).encode("latin-1")
+    return pages
+
+
+def measure(function):
+    """-> (result, best seconds, peak MB)"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak / 1024 / 1024
+
+
+def main(paths):
+    if paths:
+        corpus = {}
+        for path in paths:
+            with open(path, "rb") as f:
+                corpus[path] = f.read()
+    else:
+        corpus = generated_corpus()
+
+    parsers = ["html.parser"] + (["lxml"] if scraper._lxml_available() else [])
+    print(f"{'page':32} {'size':>9} {'mode':22} {'ms':>9} {'peak MB':>8} {'read KB':>8}  same")
+
+    totals = {}
+    for name, body in corpus.items():
+        expected, seconds, peak = measure(lambda: legacy_scrape(body))
+        totals["bs4 full tree"] = totals.get("bs4 full tree", 0) + seconds
+        print(f"{name[-32:]:32} {len(body) // 1024:>7}KB {'bs4 full tree':22} "
+              f"{seconds * 1000:>9.1f} {peak:>8.1f} {len(body) // 1024:>8}")
+
+        for parser in parsers:
+            mode = f"streaming {parser}"
+            (text, read), seconds, peak = measure(lambda: streaming_scrape(body, parser))
+            totals[mode] = totals.get(mode, 0) + seconds
+            print(f"{'':32} {'':>9} {mode:22} {seconds * 1000:>9.1f} {peak:>8.1f} "
+                  f"{read // 1024:>8}  {'yes' if text == expected else 'no'}")
+
+    print()
+    baseline = totals["bs4 full tree"]
+    for mode, seconds in totals.items():
+        print(f"{mode:22} total {seconds * 1000:9.1f} ms  ({baseline / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,87 @@
+"""
+Summarizer Benchmark - TextRank summarizer on large inputs
+Time and peak memory of summarizer.summarize() per input size, to check it
+stays linear in time and flat in memory (no network).
+
+Usage:
+    python bench_summarizer.py docs/*.txt     # your own documents
+    python bench_summarizer.py                # generated text (100 KB - 8 MB) and worst cases
+"""
+
+import sys
+import time
+import random
+import tracemalloc
+import summarizer
+
+TOPICS = {
+    "python": "Python interpreter bytecode module package library syntax indentation typing",
+    "weather": "storm rainfall temperature forecast pressure humidity wind climate season",
+    "history": "empire dynasty war treaty revolution century monarchy colony trade",
+}
+FILLER = "the of and a to in is was for on that with as by it this from at"
+
+
+def generated_text(size: int, seed: int = 7) -> str:
+    """Paragraphs of sentences mixing a few topic vocabularies, about size characters"""
+    rng = random.Random(seed)
+    topics = {name: words.split() for name, words in TOPICS.items()}
+    filler = FILLER.split()
+    parts = []
+    length = 0
+    while length < size:
+        topic = topics[rng.choice(list(topics))]
+        words = [rng.choice(topic if rng.random() < 0.4 else filler)
+                 for _ in range(rng.randint(8, 25))]
+        sentence = " ".join(words).capitalize() + "."
+        parts.append(sentence + ("\n" if rng.random() < 0.1 else " "))
+        length += len(sentence) + 1
+    return "".join(parts)
+
+
+def measure(function):
+    """-> (result, seconds, peak MB)"""
+    started = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 / 1024
+
+
+def main(paths):
+    if paths:
+        corpus = {}
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                corpus[path] = f.read()
+    else:
+        corpus = {f"generated-{kb}KB": generated_text(kb * 1024) for kb in (100, 1024, 4096, 8192)}
+        # Worst cases: a period after every few words that never ends a sentence,
+        # and one 1 MB "sentence" with no punctuation at all
+        corpus["abbreviations-1024KB"] = "See No. 5 and " * (1024 * 1024 // 14)
+        corpus["no-punctuation-1024KB"] = " ".join(generated_text(1024 * 1024).replace(".", "").split())
+
+    cases = [(name, text, summarizer.SUMMARY_SENTENCES) for name, text in corpus.items()]
+    if not paths:
+        # The agent picks `sentences`; a huge value must cost no more than the cap
+        cases.append(("generated-1024KB sentences=1000", corpus["generated-1024KB"], 1000))
+
+    print(f"{'input':32} {'size':>9} {'sentences':>10} {'ms':>9} {'MB/s':>7} {'peak MB':>8}")
+    for name, text, sentences in cases:
+        count = sum(1 for _ in summarizer.split_sentences(text))
+        summary, seconds, peak = measure(lambda: summarizer.summarize(text, sentences))
+        megabytes = len(text) / 1024 / 1024
+        print(f"{name[-32:]:32} {len(text) // 1024:>7}KB {count:>10} {seconds * 1000:>9.1f} "
+              f"{megabytes / seconds:>7.1f} {peak:>8.1f}")
+
+    print()
+    print("Summary of the last input:")
+    print(summary)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,117 @@
+"""
+Budgets - Per-request limits on iterations, wall clock and tokens
+Tracks what an agent run uses; the executor stops the run gracefully
+(with a partial answer) once any limit is reached.
+"""
+
+import os
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from metrics import Counter
+
+# Settings (defaults and upper bounds for per-request budgets)
+BUDGET_MAX_ITERATIONS = int(os.getenv("BUDGET_MAX_ITERATIONS", "8"))
+BUDGET_MAX_SECONDS = float(os.getenv("BUDGET_MAX_SECONDS", "60"))
+BUDGET_MAX_INPUT_TOKENS = int(os.getenv("BUDGET_MAX_INPUT_TOKENS", "60000"))
+BUDGET_MAX_OUTPUT_TOKENS = int(os.getenv("BUDGET_MAX_OUTPUT_TOKENS", "8000"))
+
+# Metrics
+BUDGET_STOPS = Counter("agent_budget_stops_total", "Agent runs stopped by a budget limit", ["reason"])
+
+
+class Budget(BaseCallbackHandler):
+    """
+    Limits for one agent run, and the usage counted so far.
+    Pass it to the executor (budget=...) and as a callback.
+    """
+
+    # Only updates counters, no need to hop to a thread
+    run_inline = True
+
+    def __init__(self, max_iterations: int = BUDGET_MAX_ITERATIONS,
+                 max_seconds: float = BUDGET_MAX_SECONDS,
+                 max_input_tokens: int = BUDGET_MAX_INPUT_TOKENS,
+                 max_output_tokens: int = BUDGET_MAX_OUTPUT_TOKENS):
+        self.max_iterations = max_iterations
+        self.max_seconds = max_seconds
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+
+        self.started = time.perf_counter()
+        self.iterations = 0
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.stopped = None  # reason the run was cut short
+
+    @classmethod
+    def from_request(cls, **limits):
+        """Server defaults, lowered by any limits the client asked for"""
+        defaults = {
+            "max_iterations": BUDGET_MAX_ITERATIONS,
+            "max_seconds": BUDGET_MAX_SECONDS,
+            "max_input_tokens": BUDGET_MAX_INPUT_TOKENS,
+            "max_output_tokens": BUDGET_MAX_OUTPUT_TOKENS,
+        }
+        return cls(**{
+            name: min(default, limits[name]) if limits.get(name) is not None else default
+            for name, default in defaults.items()
+        })
+
+    # USAGE
+
+    def on_llm_end(self, response, **kwargs):
+        self.llm_calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self.tool_calls += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def usage(self) -> dict:
+        """What the run used (returned to the client)"""
+        return {
+            "iterations": self.iterations,
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "seconds": round(self.elapsed(), 3),
+            "stopped": self.stopped,
+        }
+
+    # LIMITS
+
+    def exceeded(self):
+        """Name of the first limit reached, or None"""
+        if self.iterations >= self.max_iterations:
+            return "iterations"
+        if self.elapsed() >= self.max_seconds:
+            return "time"
+        if self.input_tokens >= self.max_input_tokens:
+            return "input_tokens"
+        if self.output_tokens >= self.max_output_tokens:
+            return "output_tokens"
+        return None
+
+    def stop(self, reason: str):
+        if self.stopped is None:
+            self.stopped = reason
+            BUDGET_STOPS.inc(reason)
+
+    def stopped_answer(self, intermediate_steps) -> str:
+        """Answer for a run cut short: say why, and pass on the last tool result"""
+        limit = self.stopped.replace("_", " ")
+        answer = f"I stopped before finishing because the request reached its {limit} budget."
+        if intermediate_steps:
+            action, observation = intermediate_steps[-1]
+            answer += f" Last result from {action.tool}: {str(observation)[:1000]}"
+        return answer
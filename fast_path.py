@@ -0,0 +1,156 @@
+"""
+Fast Path - Answer trivial questions without the LLM
+Pure arithmetic and simple "weather in X" questions call the tool directly;
+anything the patterns don't match with confidence goes to the full agent.
+"""
+
+import os
+import re
+import asyncio
+from contextlib import nullcontext
+from metrics import Counter
+
+# Settings (opt-in)
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "false").lower() == "true"
+
+# Patterns are matched against the whole question (case-insensitive).
+# MATH needs an "expression" group, WEATHER a "city" group.
+FAST_PATH_MATH_PATTERN = os.getenv(
+    "FAST_PATH_MATH_PATTERN",
+    r"(?:(?:what\s+is|what's|calculate|compute|evaluate|solve)\s+)?"
+    r"(?P<expression>[\d\s.()+\-*/x×÷]*\d[\d\s.()+\-*/x×÷]*)\s*=?\s*\??"
+)
+FAST_PATH_WEATHER_PATTERN = os.getenv(
+    "FAST_PATH_WEATHER_PATTERN",
+    r"(?:(?:what\s+is|what's|how\s+is|how's|get|show(?:\s+me)?)\s+)?(?:the\s+)?"
+    r"(?:current\s+)?(?:weather|temperature)\s+(?:in|for|at)\s+"
+    r"(?P<city>[a-z][a-z .'\-]{0,40}?)(?:,\s*[a-z .]{2,30})?"
+    r"(?:\s+(?:right\s+)?(?:now|today))?\s*[?.!]?"
+)
+
+# Tools the fast path calls, in order of preference (first one available)
+FAST_PATH_MATH_TOOLS = os.getenv("FAST_PATH_MATH_TOOLS", "mcp_calculator").split(",")
+FAST_PATH_WEATHER_TOOLS = os.getenv("FAST_PATH_WEATHER_TOOLS", "get_weather,mcp_weather").split(",")
+
+# Metrics
+LOOKUPS = Counter("fast_path_lookups_total", "Questions checked by the fast path, by route and result",
+                  ["route", "result"])
+
+# Words that mean the question is more than "current weather in one city",
+# or that the "city" is really a pronoun or a vague place ("my area", "it")
+NOT_A_CITY = {"and", "or", "vs", "versus", "tomorrow", "tonight", "yesterday",
+              "forecast", "next", "last", "week", "weekend", "month",
+              "it", "here", "there", "this", "that", "me", "us", "my", "our", "your",
+              "their", "his", "her", "area", "region", "neighborhood", "neighbourhood",
+              "location", "place", "town", "city", "home", "local"}
+
+# Operators the calculator accepts, with common spellings of the others.
+# Powers ("^", "**") are left to the agent: unbounded ones hang the calculator.
+OPERATOR_SPELLINGS = {"×": "*", "x": "*", "÷": "/"}
+
+# Dates and year ranges are not calculations: three numbers joined by the
+# same separator ("10/16/2026", "2026-10-16", "16.10.2026"), a year and a
+# month ("2026-10") or two years ("2024-2025"). "100/4" and "1.5/3" are math.
+_DATE_LIKE = re.compile(r"\d{1,4}([\-/.])\d{1,2}\1\d{1,4}"
+                        r"|(?:19|20)\d\d-(?:0[1-9]|1[0-2]|(?:19|20)\d\d)")
+_OPERATION = re.compile(r"\d\s*[+\-*/]\s*[(\-]*\s*\d")
+
+
+def normalize_expression(expression: str):
+    """Expression in calculator syntax, or None if it is not clearly arithmetic"""
+    if _DATE_LIKE.fullmatch(expression.strip()):
+        return None
+    for spelling, operator in OPERATOR_SPELLINGS.items():
+        expression = expression.replace(spelling, operator)
+    expression = " ".join(expression.split())
+
+    # A lone number ("2024?") is not a calculation, and neither is a power
+    if "**" in expression or not _OPERATION.search(expression):
+        return None
+    return expression
+
+
+class FastPath:
+    """Pattern-matched shortcuts from a question straight to one tool call"""
+
+    def __init__(self, tools, math_pattern: str = FAST_PATH_MATH_PATTERN,
+                 weather_pattern: str = FAST_PATH_WEATHER_PATTERN):
+        by_name = {t.name: t for t in tools}
+        self.math_tool = next((by_name[n.strip()] for n in FAST_PATH_MATH_TOOLS
+                               if n.strip() in by_name), None)
+        self.weather_tool = next((by_name[n.strip()] for n in FAST_PATH_WEATHER_TOOLS
+                                  if n.strip() in by_name), None)
+        self.math_pattern = re.compile(math_pattern, re.IGNORECASE)
+        self.weather_pattern = re.compile(weather_pattern, re.IGNORECASE)
+        self.counts = {}  # (route, result) -> lookups
+
+    def _record(self, route: str, result: str):
+        LOOKUPS.inc(route, result)
+        self.counts[(route, result)] = self.counts.get((route, result), 0) + 1
+
+    def match(self, question: str):
+        """(route, tool, tool input) for a confident match, else None"""
+        question = question.strip()
+
+        if self.math_tool is not None:
+            match = self.math_pattern.fullmatch(question)
+            expression = match and normalize_expression(match.group("expression"))
+            if expression:
+                return "math", self.math_tool, {"expression": expression}
+
+        if self.weather_tool is not None:
+            match = self.weather_pattern.fullmatch(question)
+            if match:
+                city = match.group("city").strip(" .")
+                if not NOT_A_CITY & set(city.lower().split()):
+                    return "weather", self.weather_tool, {"city": city.title()}
+
+        return None
+
+    async def answer(self, question: str, slot=None, budget=None):
+        """
+        Answer from a direct tool call, or None to use the full agent.
+        slot: async context manager held around the call (admission control);
+        budget: Budget that counts the call and bounds it by its max_seconds.
+        """
+        matched = self.match(question)
+        if matched is None:
+            self._record("none", "miss")
+            return None
+
+        route, tool, tool_input = matched
+        config = {"callbacks": [budget]} if budget is not None else None
+        timeout = budget.max_seconds if budget is not None else None
+        async with slot or nullcontext():
+            try:
+                result = str(await asyncio.wait_for(tool.ainvoke(tool_input, config=config),
+                                                    timeout))
+            except Exception:
+                # Let the agent deal with it (and explain the error)
+                self._record(route, "error")
+                return None
+
+        if route == "math":
+            if result.startswith("Error"):
+                self._record(route, "error")
+                return None
+            self._record(route, "hit")
+            return f"{tool_input['expression']} = {result}"
+
+        self._record(route, "hit")
+        return result
+
+    def stats(self) -> dict:
+        """Hit ratio overall and lookups per route / result"""
+        hits = sum(n for (_, result), n in self.counts.items() if result == "hit")
+        lookups = sum(self.counts.values())
+        routes = {}
+        for (route, result), n in self.counts.items():
+            routes.setdefault(route, {})[result] = n
+
+        return {
+            "hits": hits,
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "routes": routes,
+        }
@@ -3,54 +3,119 @@ Gemini Service - Handles LLM configuration and agent creation
 Hybrid approach: Combines regular tools + MCP tools
 """
 
-import os
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+
+# Before the imports below: their settings are read from the environment
+load_dotenv()
+
 try:
-    from langchain.agents import AgentExecutor, create_tool_calling_agent
+    from langchain.agents import create_tool_calling_agent
 except ImportError:
-    from langchain.agents import AgentExecutor, create_react_agent as create_tool_calling_agent
+    from langchain.agents import create_react_agent as create_tool_calling_agent
 from langchain.prompts import ChatPromptTemplate
 
 # Import regular tools
-from tools import ALL_TOOLS
+from tools import ALL_TOOLS, load_tool_dependencies
 
 # Import MCP tools (wrapped as LangChain tools)
-from mcp_client import MCP_TOOLS
+from mcp_client import MCP_TOOLS, connect_enabled_servers
 
-load_dotenv()
+from llm_cache import get_llm_cache
+from llm_backends import create_llm
+from tool_executor import ParallelAgentExecutor, pooled_tools
 
 # Combine regular tools + MCP tools
 TOOLS = ALL_TOOLS + MCP_TOOLS
 
 def get_llm():
-    """Initialize and return Gemini LLM"""
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=os.environ.get("GOOGLE_API_KEY"),
-        temperature=0,
-        enable_thought_signatures=True
-    )
+    """Initialize and return the chat model for LLM_BACKEND (Gemini by default)"""
+    # Optional disk cache (LLM_CACHE_ENABLED)
+    return create_llm(cache=get_llm_cache())
 
-def create_agent():
-    """
-    Create agent with all available tools.
-    Now includes both regular Python tools and MCP tools.
-    """
+# Agent runnables (LLM + prompt + bound tools) keyed by tool names.
+# They hold no per-run state, so they are built once and shared; the
+# AgentExecutor wrapped around them is created fresh for every run.
+_agent_runnables = {}
+
+def get_agent_runnable(tools=TOOLS):
+    """Return the cached agent runnable for a tool set, building it on first use"""
+    key = tuple(t.name for t in tools)
+    
+    if key not in _agent_runnables:
+        _agent_runnables[key] = build_agent_runnable(tools)
+    
+    return _agent_runnables[key]
+
+def describe_tools(tools) -> str:
+    """Tool list for the system prompt: only the tools actually bound"""
+    regular = [t.name for t in tools if not t.name.startswith("mcp_")]
+    mcp = [t.name for t in tools if t.name.startswith("mcp_")]
+    
+    lines = []
+    if regular:
+        lines.append(f"- Regular tools: {', '.join(regular)}")
+    if mcp:
+        lines.append(f"- MCP tools (served by MCP servers): {', '.join(mcp)}")
+    return "\n".join(lines) or "- (none)"
+
+def build_agent_runnable(tools):
+    """Build the tool-calling agent runnable for the given tools"""
     llm = get_llm()
     
-    # System prompt
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a helpful assistant with access to various tools.
+    # System prompt, listing the tools this runnable is bound to
+    system = f"""You are a helpful assistant with access to various tools.
 
-Available tools include:
-- Regular tools: calculator, weather, wikipedia, google_search, web_scraper, email, summarizer
-- MCP tools: mcp_calculator (uses MCP server for calculations)
+Available tools:
+{describe_tools(tools)}
 
-Use the appropriate tool when needed to help the user."""),
+Use the appropriate tool when needed to help the user."""
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system),
+        # Earlier turns of the conversation (optional, see sessions.py)
+        ("placeholder", "{chat_history}"),
         ("human", "{input}"),
         ("placeholder", "{agent_scratchpad}"),
     ])
     
-    agent = create_tool_calling_agent(llm, TOOLS, prompt)
-    return AgentExecutor(agent=agent, tools=TOOLS, verbose=True)
\ No newline at end of file
+    return create_tool_calling_agent(llm, tools, prompt)
+
+def create_agent(tools=TOOLS, verbose=True, **executor_options):
+    """
+    Create agent with all available tools.
+    Now includes both regular Python tools and MCP tools.
+    
+    Each call returns a new AgentExecutor, so callers running requests
+    concurrently should create one per request instead of sharing it.
+    verbose=True prints every step to the console (CLI); the API turns it
+    off and records traces instead (see tracing.py).
+    Extra keyword arguments are passed to AgentExecutor
+    (e.g. return_intermediate_steps=True, max_parallel_tools=1).
+    
+    Tool calls the LLM emits in the same turn run concurrently
+    (see tool_executor.py).
+    """
+    agent = get_agent_runnable(tools)
+    return ParallelAgentExecutor(agent=agent, tools=pooled_tools(tools), verbose=verbose, **executor_options)
+
+async def summarize_history(summary: str, messages: list) -> str:
+    """Fold dropped conversation turns into a running summary (one LLM call)"""
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in messages)
+    prompt = (
+        "Update the conversation summary with the new turns. "
+        "Keep facts, names and decisions; be brief.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\n"
+        f"New turns:\n{transcript}\n\n"
+        "Updated summary:"
+    )
+    result = await get_llm().ainvoke(prompt)
+    return result.content if isinstance(result.content, str) else str(result.content)
+
+def warmup():
+    """
+    Do the slow first-use work up front: build the LLM client and agent
+    runnable, import tool libraries and start the enabled MCP servers.
+    """
+    get_agent_runnable()
+    load_tool_dependencies()
+    connect_enabled_servers()
@@ -0,0 +1,329 @@
+"""
+HTTP Client - Shared, pooled HTTP for all web-based tools and MCP servers
+Keep-alive connections, per-host connection limits, bounded retries with
+jittered backoff, default timeouts and response-size caps.
+Sync (requests) for tools, async (httpx) for async code such as MCP handlers.
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+# Settings
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))          # seconds, doubled per retry
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.3"))
+# Longest Retry-After we wait for; a server asking for more gets no retry
+HTTP_RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", str(HTTP_READ_TIMEOUT)))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "64"))        # hosts with pooled connections
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "16"))    # connections per host
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "256"))  # async client total
+HTTP_MAX_RESPONSE_BYTES = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", str(5 * 1024 * 1024)))
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "MultiToolAI/1.0 (+https://github.com/aneessaheba/MultiToolAI)")
+
+# Retried for idempotent requests (plus connection errors)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(ValueError):
+    """Body is over the size cap (and truncation wasn't allowed)"""
+
+
+class HTTPResponse:
+    """Body-read response, the same for the sync and async clients"""
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes,
+                 encoding: str = None, truncated: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+def _read_capped(chunks, max_bytes: int, truncate: bool, url: str):
+    """Join body chunks up to max_bytes -> (content, truncated)"""
+    body = bytearray()
+    for chunk in chunks:
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            if not truncate:
+                raise ResponseTooLarge(f"Response from {url} is over {max_bytes} bytes")
+            return bytes(body[:max_bytes]), True
+    return bytes(body), False
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number attempt (1-based)"""
+    delay = HTTP_BACKOFF * (2 ** (attempt - 1)) + random.uniform(0, HTTP_BACKOFF_JITTER)
+    return min(delay, HTTP_RETRY_AFTER_MAX)
+
+
+def retry_after(headers):
+    """Seconds a Retry-After header asks for (number or HTTP date), or None"""
+    value = headers.get("Retry-After", "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class _Retry(Retry):
+    """urllib3 Retry that gives up (returns the response) when Retry-After is over the cap"""
+
+    def increment(self, method=None, url=None, response=None, error=None,
+                  _pool=None, _stacktrace=None):
+        if response is not None and self.respect_retry_after_header:
+            delay = self.get_retry_after(response)
+            if delay is not None and delay > HTTP_RETRY_AFTER_MAX:
+                raise MaxRetryError(_pool, url, ResponseError(
+                    f"Retry-After {delay:g}s is over {HTTP_RETRY_AFTER_MAX:g}s"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+# SYNC CLIENT (requests)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Process-wide requests session with pooled keep-alive connections"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = _Retry(
+                    total=HTTP_MAX_RETRIES,
+                    backoff_factor=HTTP_BACKOFF,
+                    backoff_jitter=HTTP_BACKOFF_JITTER,
+                    backoff_max=HTTP_RETRY_AFTER_MAX,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS,
+                                      pool_maxsize=HTTP_MAX_PER_HOST,
+                                      pool_block=True,
+                                      max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = HTTP_USER_AGENT
+                _session = session
+
+    return _session
+
+def get(url: str, *, timeout=None, max_bytes: int = HTTP_MAX_RESPONSE_BYTES,
+        truncate: bool = False, **kwargs) -> HTTPResponse:
+    """
+    GET through the shared session.
+    timeout: seconds or (connect, read); defaults to the HTTP_*_TIMEOUT settings
+    max_bytes: body size cap; over it, raise ResponseTooLarge or truncate
+    """
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    with get_session().get(url, timeout=timeout, stream=True, **kwargs) as response:
+        content, truncated = _read_capped(
+            response.iter_content(CHUNK_SIZE), max_bytes, truncate, url
+        )
+        return HTTPResponse(response.url, response.status_code, response.headers,
+                            content, response.encoding, truncated)
+
+@contextmanager
+def stream(url: str, *, timeout=None, max_bytes: int = HTTP_MAX_RESPONSE_BYTES,
+           chunk_size: int = CHUNK_SIZE, **kwargs):
+    """
+    GET through the shared session without reading the body up front.
+    Yields (response, chunks): chunks stops after max_bytes, and the caller
+    may stop early (the rest of the body is never downloaded).
+    """
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    with get_session().get(url, timeout=timeout, stream=True, **kwargs) as response:
+        def chunks():
+            remaining = max_bytes
+            for chunk in response.iter_content(chunk_size):
+                yield chunk[:remaining]
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    return
+
+        yield response, chunks()
+
+
+# ASYNC CLIENT (httpx)
+
+class HostSlots:
+    """
+    Per-host asyncio.Semaphores, per event loop. An entry is dropped as soon
+    as nobody holds or waits for it, and entries of closed loops on the next
+    new host, so the table only holds hosts that are in use.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._slots = {}  # (loop, host) -> [semaphore, holders + waiters]
+
+    def _prune(self):
+        for key in [key for key in list(self._slots) if key[0].is_closed()]:
+            self._slots.pop(key, None)
+
+    @asynccontextmanager
+    async def hold(self, url: str):
+        """async with slots.hold(url): at most limit of these per host at once"""
+        key = (asyncio.get_running_loop(), urlsplit(url).netloc)
+        entry = self._slots.get(key)
+        if entry is None:
+            self._prune()
+            entry = self._slots[key] = [asyncio.Semaphore(self.limit), 0]
+
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and self._slots.get(key) is entry:
+                del self._slots[key]
+
+    def __len__(self):
+        return len(self._slots)
+
+
+# httpx connections belong to the event loop that opened them: one client per loop
+_async_clients = {}
+# Per-host connection limit (httpx only limits the total)
+_host_slots = HostSlots(HTTP_MAX_PER_HOST)
+
+def get_async_client():
+    """Pooled httpx.AsyncClient for the running event loop"""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        # Clients of loops that have since closed can't be used (or closed) any more
+        for stale in [other for other in list(_async_clients) if other.is_closed()]:
+            _async_clients.pop(stale, None)
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_MAX_PER_HOST * 4),
+            headers={"User-Agent": HTTP_USER_AGENT},
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+async def aget(url: str, *, timeout=None, max_bytes: int = HTTP_MAX_RESPONSE_BYTES,
+               truncate: bool = False, **kwargs) -> HTTPResponse:
+    """Async GET with the same retry, timeout and size-cap rules as get()"""
+    import httpx
+
+    client = get_async_client()
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    attempt = 0
+    while True:
+        try:
+            async with _host_slots.hold(url):
+                async with client.stream("GET", url, **kwargs) as response:
+                    retry = response.status_code in RETRY_STATUSES and attempt < HTTP_MAX_RETRIES
+                    if retry:
+                        # Servers asking for a long wait get their error back instead
+                        delay = retry_after(response.headers)
+                        retry = delay is None or delay <= HTTP_RETRY_AFTER_MAX
+                    if not retry:
+                        body = bytearray()
+                        truncated = False
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            body.extend(chunk)
+                            if len(body) > max_bytes:
+                                if not truncate:
+                                    raise ResponseTooLarge(f"Response from {url} is over {max_bytes} bytes")
+                                body, truncated = body[:max_bytes], True
+                                break
+                        return HTTPResponse(str(response.url), response.status_code,
+                                            response.headers, bytes(body),
+                                            response.encoding, truncated)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+            if attempt >= HTTP_MAX_RETRIES:
+                raise
+            delay = None
+
+        attempt += 1
+        await asyncio.sleep(delay if delay is not None else backoff_delay(attempt))
+
+@asynccontextmanager
+async def astream(url: str, *, timeout=None, max_bytes: int = HTTP_MAX_RESPONSE_BYTES,
+                  chunk_size: int = CHUNK_SIZE, **kwargs):
+    """
+    Async stream(): yields (response, chunks) with chunks an async iterator.
+    Connection errors are retried; the host slot is held until the body is closed.
+    """
+    import httpx
+
+    client = get_async_client()
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    async with _host_slots.hold(url):
+        attempt = 0
+        while True:
+            try:
+                response = await client.send(client.build_request("GET", url, **kwargs),
+                                             stream=True)
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+                if attempt >= HTTP_MAX_RETRIES:
+                    raise
+                attempt += 1
+                await asyncio.sleep(backoff_delay(attempt))
+
+        async def chunks():
+            remaining = max_bytes
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk[:remaining]
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    return
+
+        try:
+            yield response, chunks()
+        finally:
+            await response.aclose()
+
+async def aclose():
+    """Close the running loop's async client (e.g. on shutdown)"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
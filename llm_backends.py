@@ -0,0 +1,185 @@
+"""
+LLM Backends - Chat models the agent can run on, selected with LLM_BACKEND
+gemini: Google Gemini (default)
+fake:   scripted offline model that emits tool calls and answers with a
+        configurable latency, for load tests and profiling without network
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from sessions import count_tokens
+
+# Settings
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+# Fake backend
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))   # seconds per call
+FAKE_LLM_JITTER = float(os.getenv("FAKE_LLM_JITTER", "0.1"))     # +/- seconds, uniform
+FAKE_LLM_SCRIPT = os.getenv("FAKE_LLM_SCRIPT", "")               # JSON file of rules
+
+# Default fake script: first matching rule wins. "args" and "answer" are
+# formatted with the pattern's named groups; "answer" also gets {observations}
+# (the tool results) once the tools have run.
+DEFAULT_FAKE_RULES = [
+    {
+        "pattern": r"(?:weather|temperature)\s+(?:in|for|at)\s+(?P<city>[A-Za-z .'\-]+?)\s*[?.!]*$",
+        "tool_calls": [{"name": "get_weather", "args": {"city": "{city}"}}],
+        "answer": "Here is the current weather: {observations}",
+    },
+    {
+        "pattern": r"(?P<expression>[\d.()]+(?:\s*[+\-*/]\s*[\d.()]+)+)",
+        "tool_calls": [{"name": "mcp_calculator", "args": {"expression": "{expression}"}}],
+        "answer": "The result is {observations}.",
+    },
+    {
+        "pattern": r"(?:who|what)\s+(?:is|was|are)\s+(?P<topic>.+?)\s*\?*$",
+        "tool_calls": [{"name": "search_wikipedia", "args": {"query": "{topic}"}}],
+        "answer": "According to Wikipedia: {observations}",
+    },
+]
+DEFAULT_FAKE_ANSWER = "This is a scripted answer to: {question}"
+
+
+# REGISTRY
+
+BACKENDS = {}
+
+def register_backend(name: str):
+    """Decorator: register a factory (cache) -> chat model under a name"""
+    def decorate(factory):
+        BACKENDS[name] = factory
+        return factory
+    return decorate
+
+def create_llm(backend: str = None, cache=None):
+    """Chat model for a registered backend (LLM_BACKEND by default)"""
+    backend = backend or LLM_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](cache)
+
+
+@register_backend("gemini")
+def gemini_backend(cache=None):
+    # Imported here: the Google SDK alone takes ~2s to import
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # Streaming calls bypass LangChain's cache, so streaming is turned
+    # off while a cache is set
+    return ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        google_api_key=os.environ.get("GOOGLE_API_KEY"),
+        temperature=0,
+        enable_thought_signatures=True,
+        cache=cache,
+        disable_streaming=cache is not None
+    )
+
+
+@register_backend("fake")
+def fake_backend(cache=None):
+    rules = DEFAULT_FAKE_RULES
+    answer = DEFAULT_FAKE_ANSWER
+    if FAKE_LLM_SCRIPT:
+        with open(FAKE_LLM_SCRIPT) as f:
+            script = json.load(f)
+        rules = script.get("rules", rules)
+        answer = script.get("default_answer", answer)
+
+    return FakeToolChatModel(rules=rules, default_answer=answer,
+                             latency=FAKE_LLM_LATENCY, jitter=FAKE_LLM_JITTER, cache=cache)
+
+
+# FAKE MODEL
+
+class FakeToolChatModel(BaseChatModel):
+    """
+    Offline chat model driven by regex rules on the user's question.
+
+    - First call of a run: if a rule matches and its tools are bound, return
+      its tool calls; otherwise answer directly
+    - After the tool results come back: return the rule's answer
+    - Sleeps latency +/- jitter per call, like a remote model would
+    - Reports estimated token usage, so metrics look like a real run
+    """
+
+    model_name: str = "fake-tool-model"
+    rules: list = DEFAULT_FAKE_RULES
+    default_answer: str = DEFAULT_FAKE_ANSWER
+    latency: float = FAKE_LLM_LATENCY
+    jitter: float = FAKE_LLM_JITTER
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model_name, "rules": self.rules}
+
+    def bind_tools(self, tools, **kwargs):
+        """Remember the bound tools: rules calling other tools are skipped"""
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages, tools=None) -> ChatResult:
+        bound = {t["function"]["name"] for t in tools or []}
+
+        # Messages of the current question: the last human message onwards
+        start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        question = str(messages[start].content) if messages else ""
+        observations = [str(m.content) for m in messages[start:] if isinstance(m, ToolMessage)]
+
+        rule, groups = self._match(question, bound)
+        if rule is None:
+            message = AIMessage(content=self.default_answer.format(question=question))
+        elif observations:
+            message = AIMessage(content=rule["answer"].format(
+                observations="; ".join(observations), question=question, **groups
+            ))
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {
+                    "name": call["name"],
+                    "args": {k: str(v).format(**groups) for k, v in call["args"].items()},
+                    "id": f"call_{i}",
+                }
+                for i, call in enumerate(rule["tool_calls"])
+            ])
+
+        input_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        output_tokens = count_tokens(message.content or json.dumps(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _match(self, question: str, bound: set):
+        """First rule matching the question whose tools are all bound"""
+        for rule in self.rules:
+            match = re.search(rule["pattern"], question, re.IGNORECASE)
+            if match and all(call["name"] in bound for call in rule["tool_calls"]):
+                groups = {k: (v or "").strip() for k, v in match.groupdict().items()}
+                return rule, groups
+        return None, {}
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        time.sleep(self._delay())
+        return self._respond(messages, tools)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        await asyncio.sleep(self._delay())
+        return self._respond(messages, tools)
@@ -0,0 +1,165 @@
+"""
+LLM Cache - Disk-backed cache of LLM responses (SQLite)
+With temperature=0, the same messages + model + bound tools give the same
+output, so regression runs and retries can skip the Gemini round trip.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+# Settings (opt-in)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.sqlite")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+# Message fields that change between identical calls and are left out of
+# the key: ids derived from the run id ("run--<uuid>-0"), and usage /
+# response metadata (a cache hit reports different usage than a real call).
+# Tool call ids are kept: on a replay they come back from the cache unchanged.
+VOLATILE_FIELDS = ("usage_metadata", "response_metadata")
+
+
+def canonical_prompt(prompt: str) -> str:
+    """Serialized message list with volatile fields removed"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+
+    for message in messages if isinstance(messages, list) else []:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if not isinstance(kwargs, dict):
+            continue
+        for field in VOLATILE_FIELDS:
+            kwargs.pop(field, None)
+        if str(kwargs.get("id", "")).startswith(("run-", "lc_run-")):
+            kwargs.pop("id")
+
+    return json.dumps(messages, sort_keys=True)
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    LangChain cache storing generations in a local SQLite file.
+
+    - Key: SHA-256 of the serialized message list (prompt) and the LLM
+      string, which includes model name, parameters and bound tool schemas
+    - Bounded by total stored bytes; least recently used entries are
+      evicted first. Triggers keep the running total (llm_cache_stats),
+      so inserts don't sum the whole table
+    - WAL mode, so several processes can share the file
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_mb: float = LLM_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS llm_cache_access ON llm_cache (last_access);
+
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                size INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO llm_cache_stats (id, size)
+                VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM llm_cache));
+
+            CREATE TRIGGER IF NOT EXISTS llm_cache_ai AFTER INSERT ON llm_cache BEGIN
+                UPDATE llm_cache_stats SET size = size + new.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_ad AFTER DELETE ON llm_cache BEGIN
+                UPDATE llm_cache_stats SET size = size - old.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_au AFTER UPDATE OF size ON llm_cache BEGIN
+                UPDATE llm_cache_stats SET size = size + new.size - old.size WHERE id = 0;
+            END;
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        prompt = canonical_prompt(prompt)
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        """Cached generations, or None"""
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+        self.hits += 1
+        return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        """Store generations, evicting old entries past the size limit"""
+        value = dumps(return_val)
+        with self._lock:
+            # Upsert, not REPLACE: REPLACE's implicit delete skips the triggers
+            self._conn.execute(
+                "INSERT INTO llm_cache (key, value, size, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "size = excluded.size, last_access = excluded.last_access",
+                (self._key(prompt, llm_string), value, len(value), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT size FROM llm_cache_stats WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% of the limit so we don't evict on every insert
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY last_access"
+        ):
+            stale.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", stale)
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+_llm_cache = None
+
+def get_llm_cache():
+    """Shared cache instance if LLM_CACHE_ENABLED, else None"""
+    global _llm_cache
+
+    if LLM_CACHE_ENABLED and _llm_cache is None:
+        _llm_cache = SQLiteLLMCache()
+
+    return _llm_cache
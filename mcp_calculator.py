@@ -4,6 +4,7 @@ A standalone server that evaluates mathematical expressions via MCP protocol
 """
 
 import asyncio
+import sys
 import json
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
@@ -122,4 +123,9 @@ async def main():
 
 # Entry point - run the server when this file is executed
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if "--sse" in sys.argv:
+        # Shared mode: one HTTP/SSE server for all API workers
+        from mcp_transport import serve_sse
+        serve_sse(server)
+    else:
+        asyncio.run(main())
\ No newline at end of file
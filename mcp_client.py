@@ -4,218 +4,272 @@ Fixed: Proper async handling for LangChain compatibility
 """
 
 import os
+import time
+import functools
 import threading
 import asyncio
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain.agents import tool
-from mcp_tools import MCP_SERVERS
-
-# Global sessions and event loop
-calculator_session = None
-memory_session = None
-weather_session = None
-email_session = None  # NEW: Email session
+from langchain_core.tools import StructuredTool
+from mcp_tools import MCP_SERVERS, MCP_TRANSPORT, MCP_SHARED_HOST
+from metrics import MCP_LATENCY, MCP_ERRORS
+import tracing
+
+# Seconds to wait for one MCP tool call
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "30"))
+
+# Global sessions (server name -> ClientSession) and event loop
+sessions = {}
+session_locks = {}
 loop = None
 loop_thread = None
+loop_lock = threading.Lock()
 
 def get_event_loop():
     """Get or create persistent event loop in background thread"""
     global loop, loop_thread
     
-    if loop is None or not loop.is_running():
-        loop = asyncio.new_event_loop()
-        
-        def run_loop():
-            asyncio.set_event_loop(loop)
-            loop.run_forever()
-        
-        loop_thread = threading.Thread(target=run_loop, daemon=True)
-        loop_thread.start()
+    with loop_lock:
+        if loop is None or loop.is_closed():
+            loop = asyncio.new_event_loop()
+            
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.run_forever()
+            
+            loop_thread = threading.Thread(target=run_loop, daemon=True)
+            loop_thread.start()
     
     return loop
 
+# Background tasks that keep each MCP server connection open
+session_tasks = {}
+
+def server_transport(name: str):
+    """Transport context manager for a server: private stdio subprocess or shared SSE"""
+    config = MCP_SERVERS[name]
+    
+    if MCP_TRANSPORT == "sse":
+        from mcp.client.sse import sse_client
+        return sse_client(f"http://{MCP_SHARED_HOST}:{config['port']}/sse")
+    
+    from mcp import StdioServerParameters
+    from mcp.client.stdio import stdio_client
+    
+    server_params = StdioServerParameters(
+        command="python",
+        args=[config["script"]]
+    )
+    return stdio_client(server_params)
+
+async def open_session(name: str):
+    """
+    Connect to an MCP server and return an initialized session.
+    
+    The transport and session contexts must be entered and exited by the
+    same task, so a long-lived task on the background loop holds them open
+    and hands the session back. The mcp package is imported here so
+    importing this module stays cheap.
+    """
+    from mcp import ClientSession
+    
+    ready = asyncio.get_running_loop().create_future()
+    
+    async def hold_session():
+        try:
+            async with server_transport(name) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    # Keep the connection open for the life of the process
+                    await asyncio.Event().wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            raise
+        finally:
+            # Connection dropped: reconnect on next use
+            sessions.pop(name, None)
+    
+    session_tasks[name] = asyncio.get_running_loop().create_task(hold_session())
+    return await ready
+
+async def get_session(name: str):
+    """
+    Return the open session for a server, connecting on first use.
+    One session per server per process; concurrent tool calls are
+    multiplexed over it (JSON-RPC request ids), so it acts as the pool.
+    """
+    if name not in sessions:
+        lock = session_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if name not in sessions:
+                sessions[name] = await open_session(name)
+    
+    return sessions[name]
+
 # Connect to Calculator MCP Server
 async def connect_calculator():
     """Connect to MCP calculator server"""
-    global calculator_session
-    
-    if calculator_session is None:
-        server_params = StdioServerParameters(
-            command="python",
-            args=["mcp_calculator.py"]
-        )
-        
-        context_manager = stdio_client(server_params)
-        read_stream, write_stream = await context_manager.__aenter__()
-        calculator_session = ClientSession(read_stream, write_stream)
-        await calculator_session.initialize()
-    
-    return calculator_session
+    return await get_session("calculator")
 
 # Connect to Memory MCP Server
 async def connect_memory():
     """Connect to MCP memory server"""
-    global memory_session
-    
-    if memory_session is None:
-        server_params = StdioServerParameters(
-            command="python",
-            args=["mcp_memory.py"]
-        )
-        
-        context_manager = stdio_client(server_params)
-        read_stream, write_stream = await context_manager.__aenter__()
-        memory_session = ClientSession(read_stream, write_stream)
-        await memory_session.initialize()
-    
-    return memory_session
+    return await get_session("memory")
 
 # Connect to Weather MCP Server
 async def connect_weather():
     """Connect to MCP weather server"""
-    global weather_session
-    
-    if weather_session is None:
-        server_params = StdioServerParameters(
-            command="python",
-            args=["mcp_weather.py"]
-        )
-        
-        context_manager = stdio_client(server_params)
-        read_stream, write_stream = await context_manager.__aenter__()
-        weather_session = ClientSession(read_stream, write_stream)
-        await weather_session.initialize()
-    
-    return weather_session
+    return await get_session("weather")
 
 # NEW: Connect to Email MCP Server
 async def connect_email():
     """Connect to MCP email server"""
-    global email_session
-    
-    if email_session is None:
-        server_params = StdioServerParameters(
-            command="python",
-            args=["mcp_email.py"]
-        )
-        
-        context_manager = stdio_client(server_params)
-        read_stream, write_stream = await context_manager.__aenter__()
-        email_session = ClientSession(read_stream, write_stream)
-        await email_session.initialize()
-    
-    return email_session
+    return await get_session("gmail")
 
 # Helper function to run async code from sync context
 def run_async(coro):
     """Run async coroutine in persistent event loop"""
     loop = get_event_loop()
     future = asyncio.run_coroutine_threadsafe(coro, loop)
-    return future.result(timeout=30)
+    return future.result(timeout=MCP_CALL_TIMEOUT)
 
-# CALCULATOR MCP TOOL
+async def run_on_loop(coro):
+    """
+    Await a coroutine on the persistent MCP loop from another event loop.
+    The sessions belong to that loop, but the caller's loop is not blocked
+    (no thread waits on future.result()).
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), MCP_CALL_TIMEOUT)
+    except asyncio.TimeoutError:
+        future.cancel()
+        raise
 
-@tool
-def mcp_calculator(expression: str) -> float:
-    """Calculate math expressions using MCP Calculator."""
-    if not MCP_SERVERS["calculator"]["enabled"]:
-        raise ValueError("MCP Calculator not enabled")
+async def call_mcp_tool(session, server: str, name: str, arguments: dict) -> str:
+    """Call a tool on an MCP session and return its text, recording round-trip time"""
+    started = time.perf_counter()
+    try:
+        result = await session.call_tool(name, arguments)
+    except Exception:
+        MCP_ERRORS.inc(server, name)
+        raise
+    finally:
+        MCP_LATENCY.observe(server, name, value=time.perf_counter() - started)
     
-    async def call_mcp():
-        session = await connect_calculator()
-        result = await session.call_tool("calculate", {"expression": expression})
-        return result.content[0].text
+    return result.content[0].text
+
+def mcp_tool(server: str, label: str):
+    """
+    Turn an async MCP call into a LangChain tool usable from both paths:
+    - ainvoke: awaited on the MCP loop without holding a thread
+    - invoke: blocks on the MCP loop (run_async)
+    Name, description and arguments come from the decorated coroutine.
+    """
+    def decorate(call_mcp):
+        def check_enabled():
+            if not MCP_SERVERS[server]["enabled"]:
+                raise ValueError(f"{label} not enabled")
+        
+        @functools.wraps(call_mcp)
+        def run(*args, **kwargs):
+            check_enabled()
+            with tracing.span("mcp", f"{server}.{call_mcp.__name__}"):
+                return run_async(call_mcp(*args, **kwargs))
+        
+        @functools.wraps(call_mcp)
+        async def arun(*args, **kwargs):
+            check_enabled()
+            with tracing.span("mcp", f"{server}.{call_mcp.__name__}"):
+                return await run_on_loop(call_mcp(*args, **kwargs))
+        
+        return StructuredTool.from_function(func=run, coroutine=arun)
     
-    return run_async(call_mcp())
+    return decorate
+
+# CALCULATOR MCP TOOL
+
+@mcp_tool("calculator", "MCP Calculator")
+async def mcp_calculator(expression: str) -> float:
+    """Calculate math expressions using MCP Calculator."""
+    session = await connect_calculator()
+    return await call_mcp_tool(session, "calculator", "calculate", {"expression": expression})
 
 # NEW: EMAIL MCP TOOL
 
-@tool
-def mcp_send_email(to_email: str, subject: str, body: str) -> str:
+@mcp_tool("gmail", "MCP Email")
+async def mcp_send_email(to_email: str, subject: str, body: str) -> str:
     """Send an email using MCP Email server."""
-    if not MCP_SERVERS["gmail"]["enabled"]:
-        raise ValueError("MCP Email not enabled")
-    
-    async def call_mcp():
-        session = await connect_email()
-        result = await session.call_tool("send_email", {
-            "to_email": to_email,
-            "subject": subject,
-            "body": body
-        })
-        return result.content[0].text
-    
-    return run_async(call_mcp())
+    session = await connect_email()
+    return await call_mcp_tool(session, "gmail", "send_email", {
+        "to_email": to_email,
+        "subject": subject,
+        "body": body
+    })
+
+@mcp_tool("gmail", "MCP Email")
+async def mcp_email_status(message_id: str = "") -> str:
+    """Check delivery of emails queued by mcp_send_email (empty id: most recent)."""
+    session = await connect_email()
+    return await call_mcp_tool(session, "gmail", "email_status", {"message_id": message_id})
 
 # WEATHER MCP TOOL
 
-@tool
-def mcp_weather(city: str) -> str:
+@mcp_tool("weather", "MCP Weather")
+async def mcp_weather(city: str) -> str:
     """Get current weather for a city using MCP Weather server."""
-    if not MCP_SERVERS["weather"]["enabled"]:
-        raise ValueError("MCP Weather not enabled")
-    
-    async def call_mcp():
-        session = await connect_weather()
-        result = await session.call_tool("get_weather", {"city": city})
-        return result.content[0].text
-    
-    return run_async(call_mcp())
+    session = await connect_weather()
+    return await call_mcp_tool(session, "weather", "get_weather", {"city": city})
+
+@mcp_tool("weather", "MCP Weather")
+async def mcp_weather_batch(cities: list[str]) -> str:
+    """Get current weather for several cities at once using MCP Weather server."""
+    session = await connect_weather()
+    return await call_mcp_tool(session, "weather", "get_weather_batch", {"cities": cities})
 
 # MEMORY MCP TOOLS
 
-@tool
-def mcp_store_memory(content: str, tags: str = "") -> str:
+@mcp_tool("memory", "MCP Memory")
+async def mcp_store_memory(content: str, tags: str = "") -> str:
     """Store information in long-term memory using MCP Memory server."""
-    if not MCP_SERVERS["memory"]["enabled"]:
-        raise ValueError("MCP Memory not enabled")
-    
-    async def call_mcp():
-        session = await connect_memory()
-        result = await session.call_tool("store_memory", {"content": content, "tags": tags})
-        return result.content[0].text
-    
-    return run_async(call_mcp())
+    session = await connect_memory()
+    return await call_mcp_tool(session, "memory", "store_memory", {"content": content, "tags": tags})
 
-@tool
-def mcp_recall_memory(query: str, num_results: int = 3) -> str:
+@mcp_tool("memory", "MCP Memory")
+async def mcp_recall_memory(query: str, num_results: int = 3) -> str:
     """Search and recall memories using MCP Memory server."""
-    if not MCP_SERVERS["memory"]["enabled"]:
-        raise ValueError("MCP Memory not enabled")
-    
-    async def call_mcp():
-        session = await connect_memory()
-        result = await session.call_tool("recall_memory", {"query": query, "num_results": num_results})
-        return result.content[0].text
-    
-    return run_async(call_mcp())
+    session = await connect_memory()
+    return await call_mcp_tool(session, "memory", "recall_memory", {"query": query, "num_results": num_results})
 
-@tool
-def mcp_list_all_memories() -> str:
+@mcp_tool("memory", "MCP Memory")
+async def mcp_list_all_memories() -> str:
     """List all stored memories using MCP Memory server."""
-    if not MCP_SERVERS["memory"]["enabled"]:
-        raise ValueError("MCP Memory not enabled")
-    
-    async def call_mcp():
-        session = await connect_memory()
-        result = await session.call_tool("list_all_memories", {})
-        return result.content[0].text
-    
-    return run_async(call_mcp())
+    session = await connect_memory()
+    return await call_mcp_tool(session, "memory", "list_all_memories", {})
 
-@tool
-def mcp_clear_all_memories() -> str:
+@mcp_tool("memory", "MCP Memory")
+async def mcp_clear_all_memories() -> str:
     """Delete all stored memories using MCP Memory server."""
-    if not MCP_SERVERS["memory"]["enabled"]:
-        raise ValueError("MCP Memory not enabled")
-    
-    async def call_mcp():
-        session = await connect_memory()
-        result = await session.call_tool("clear_all_memories", {})
-        return result.content[0].text
+    session = await connect_memory()
+    return await call_mcp_tool(session, "memory", "clear_all_memories", {})
+
+# Connect functions per MCP_SERVERS entry
+SERVER_CONNECTORS = {
+    "calculator": connect_calculator,
+    "weather": connect_weather,
+    "gmail": connect_email,
+    "memory": connect_memory,
+}
+
+def connect_enabled_servers():
+    """Start and initialize every enabled MCP server now (used by warmup)"""
+    async def connect_all():
+        await asyncio.gather(*[
+            connect() for name, connect in SERVER_CONNECTORS.items()
+            if MCP_SERVERS[name]["enabled"]
+        ])
     
-    return run_async(call_mcp())
+    run_async(connect_all())
 
 # Get enabled MCP tools
 def get_mcp_tools():
@@ -228,11 +282,12 @@ def get_mcp_tools():
     
     # Weather MCP
     if MCP_SERVERS["weather"]["enabled"]:
-        tools.append(mcp_weather)
+        tools.extend([mcp_weather, mcp_weather_batch])
     
     # NEW: Email MCP
     if MCP_SERVERS["gmail"]["enabled"]:
         tools.append(mcp_send_email)
+        tools.append(mcp_email_status)
     
     # Memory MCP - adds 4 tools
     if MCP_SERVERS["memory"]["enabled"]:
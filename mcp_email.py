@@ -1,13 +1,10 @@
 """
 Email MCP Server
-Send emails using Gmail SMTP
+Send emails using Gmail SMTP (queued, delivered in the background by outbox.py)
 """
 
 import asyncio
-import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
 from dotenv import load_dotenv
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
@@ -16,6 +13,9 @@ import mcp.types as types
 
 load_dotenv()
 
+# After load_dotenv: outbox reads its SMTP settings at import
+import outbox
+
 # Create the MCP server instance
 server = Server("email-server")
 
@@ -44,6 +44,19 @@ async def handle_list_tools() -> list[types.Tool]:
                 },
                 "required": ["to_email", "subject", "body"]
             }
+        ),
+        types.Tool(
+            name="email_status",
+            description="Delivery status of queued emails",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "message_id": {
+                        "type": "string",
+                        "description": "Id returned by send_email (empty for the most recent emails)"
+                    }
+                }
+            }
         )
     ]
 
@@ -53,6 +66,16 @@ async def handle_call_tool(
 ) -> list[types.TextContent]:
     """Handle email sending"""
     
+    if name == "email_status":
+        message_id = (arguments or {}).get("message_id", "")
+        mailbox = outbox.get_outbox()
+        if message_id:
+            status = mailbox.status(message_id)
+            text = outbox.describe(status) if status else f"No email with id '{message_id}'"
+        else:
+            text = "\n".join(outbox.describe(s) for s in mailbox.recent(5)) or "No emails have been sent"
+        return [types.TextContent(type="text", text=text)]
+    
     if name != "send_email":
         raise ValueError(f"Unknown tool: {name}")
     
@@ -67,32 +90,19 @@ async def handle_call_tool(
         raise ValueError("Missing required fields: to_email, subject, body")
     
     try:
-        from_email = os.getenv("EMAIL_ADDRESS")
-        password = os.getenv("EMAIL_PASSWORD")
-        
-        if not from_email or not password:
+        error = outbox.configuration_error()
+        if error:
             return [types.TextContent(
                 type="text",
-                text="Error: Email not configured. Set EMAIL_ADDRESS and EMAIL_PASSWORD in .env"
+                text=f"Error: {error}"
             )]
         
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send via Gmail SMTP
-        server_smtp = smtplib.SMTP('smtp.gmail.com', 587)
-        server_smtp.starttls()
-        server_smtp.login(from_email, password)
-        server_smtp.send_message(msg)
-        server_smtp.quit()
+        # Queued: the outbox worker delivers it over a reused SMTP connection
+        message_id = outbox.get_outbox().send(to_email, subject, body)
         
         return [types.TextContent(
             type="text",
-            text=f"✓ Email sent successfully to {to_email}"
+            text=f"✓ Email to {to_email} queued for delivery (id {message_id})"
         )]
     
     except Exception as e:
@@ -118,4 +128,9 @@ async def main():
         )
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if "--sse" in sys.argv:
+        # Shared mode: one HTTP/SSE server for all API workers
+        from mcp_transport import serve_sse
+        serve_sse(server)
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -4,6 +4,7 @@ Uses official @modelcontextprotocol/server-memory for knowledge graph-based memo
 """
 
 import asyncio
+import sys
 import json
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
@@ -183,4 +184,9 @@ async def main():
         )
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if "--sse" in sys.argv:
+        # Shared mode: one HTTP/SSE server for all API workers
+        from mcp_transport import serve_sse
+        serve_sse(server)
+    else:
+        asyncio.run(main())
\ No newline at end of file
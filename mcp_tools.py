@@ -3,14 +3,27 @@ MCP Tools Configuration
 Maps your tools to existing MCP servers
 """
 
+import os
+
+# How workers reach the MCP servers:
+# - "stdio": each process spawns its own server subprocesses (default)
+# - "sse": connect to shared servers started once by shared_services.py,
+#          so `uvicorn --workers N` doesn't spawn N copies of each server
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_SHARED_HOST = os.getenv("MCP_SHARED_HOST", "127.0.0.1")
+
 # MCP Server mapping for your tools
 MCP_SERVERS = {
     "calculator": {
+        "script": "mcp_calculator.py",
+        "port": 8101,
         "package": "@prajwalaswar/calculator-mcp",
         "enabled": True,
         "replaces": "calculator"
     },
     "weather": {
+        "script": "mcp_weather.py",
+        "port": 8102,
         "package": "@timlukahorstmann/mcp-weather",
         "enabled": True,  # ENABLED: Using wttr.in (no API key needed)
         "replaces": "get_weather"
@@ -33,11 +46,15 @@ MCP_SERVERS = {
         "replaces": "web_scraper"
     },
     "gmail": {
+        "script": "mcp_email.py",
+        "port": 8103,
         "package": "@modelcontextprotocol/server-gmail",
-        "enabled": False,  # DISABLED: Timeout issues with SMTP in MCP context
+        "enabled": True,  # send_email only queues; outbox.py delivers in the background
         "replaces": "send_email"
     },
     "memory": {
+        "script": "mcp_memory.py",
+        "port": 8104,
         "package": "@modelcontextprotocol/server-memory",
         "enabled": False,  # DISABLED: Using regular ChromaDB memory instead
         "replaces": "store_memory, recall_memory, list_all_memories, clear_all_memories"
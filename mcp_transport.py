@@ -0,0 +1,42 @@
+"""
+MCP Transport - Run an MCP server as a shared local service over SSE
+Used by the multi-worker deployment mode (see shared_services.py)
+"""
+
+import argparse
+
+
+def serve_sse(server, argv=None):
+    """
+    Serve an MCP server over HTTP + SSE instead of stdio.
+
+    One process then serves every API worker: each worker opens its own
+    long-lived session on GET /sse and posts requests to /messages/.
+
+    Usage: python mcp_calculator.py --sse --port 8101
+    """
+    import uvicorn
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sse", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    sse = SseServerTransport("/messages/")
+
+    async def handle_sse(request):
+        async with sse.connect_sse(request.scope, request.receive, request._send) as streams:
+            await server.run(streams[0], streams[1], server.create_initialization_options())
+        return Response()
+
+    app = Starlette(routes=[
+        Route("/sse", endpoint=handle_sse, methods=["GET"]),
+        Mount("/messages/", app=sse.handle_post_message),
+    ])
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
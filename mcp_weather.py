@@ -4,7 +4,8 @@ Simple weather tool using wttr.in (no API key needed)
 """
 
 import asyncio
-import requests
+import sys
+import weather
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 import mcp.server.stdio
@@ -30,6 +31,21 @@ async def handle_list_tools() -> list[types.Tool]:
                 },
                 "required": ["city"]
             }
+        ),
+        types.Tool(
+            name="get_weather_batch",
+            description="Get current weather for several cities at once",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cities": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "City names (e.g., ['London', 'Paris'])"
+                    }
+                },
+                "required": ["cities"]
+            }
         )
     ]
 
@@ -39,6 +55,13 @@ async def handle_call_tool(
 ) -> list[types.TextContent]:
     """Handle weather tool call"""
     
+    if name == "get_weather_batch":
+        if not arguments or not arguments.get("cities"):
+            raise ValueError("Missing 'cities' argument")
+        
+        reports = await weather.afetch_many(arguments["cities"])
+        return [types.TextContent(type="text", text="\n".join(reports))]
+    
     if name != "get_weather":
         raise ValueError(f"Unknown tool: {name}")
     
@@ -49,12 +72,9 @@ async def handle_call_tool(
     
     try:
         # Use wttr.in - free weather service, no API key needed
-        url = f"http://wttr.in/{city}?format=%C+%t"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        weather_info = response.text.strip()
-        result = f"Weather in {city}: {weather_info}"
+        # (cached per city, concurrent lookups share one request)
+        weather_info = await weather.afetch_conditions(city)
+        result = weather.format_report(city, weather_info)
         
         return [types.TextContent(
             type="text",
@@ -84,4 +104,9 @@ async def main():
         )
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if "--sse" in sys.argv:
+        # Shared mode: one HTTP/SSE server for all API workers
+        from mcp_transport import serve_sse
+        serve_sse(server)
+    else:
+        asyncio.run(main())
\ No newline at end of file
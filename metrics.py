@@ -0,0 +1,216 @@
+"""
+Metrics - Low-overhead counters and histograms in Prometheus text format
+Recorded from a LangChain callback handler (tools, LLM calls) and the MCP client
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Default latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# All metrics, in registration order
+REGISTRY = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter, optionally labelled"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally labelled"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, *label_values, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labels, label_values, ("le", bound)), cumulative)
+            yield (f"{self.name}_bucket",
+                   _format_labels(self.labels, label_values, ("le", "+Inf")), series[-1])
+            yield f"{self.name}_sum", _format_labels(self.labels, label_values), series[-2]
+            yield f"{self.name}_count", _format_labels(self.labels, label_values), series[-1]
+
+
+class CallbackMetric:
+    """Metric whose samples are read from a function at scrape time"""
+
+    def __init__(self, name: str, help: str, kind: str, labels, read):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = tuple(labels)
+        self.read = read  # () -> {label values tuple: value}
+        REGISTRY.append(self)
+
+    def samples(self):
+        for label_values, value in self.read().items():
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# AGENT METRICS
+
+REQUESTS = Counter("agent_requests_total", "Agent requests by outcome", ["status"])
+REQUEST_LATENCY = Histogram("agent_request_latency_seconds", "End-to-end agent run latency")
+ITERATIONS = Histogram("agent_iterations", "LLM turns per agent run",
+                       buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15))
+
+TOOL_LATENCY = Histogram("agent_tool_latency_seconds", "Tool call latency", ["tool"])
+TOOL_ERRORS = Counter("agent_tool_errors_total", "Tool calls that raised", ["tool"])
+
+LLM_LATENCY = Histogram("agent_llm_latency_seconds", "LLM call latency", ["model"])
+LLM_CALLS = Counter("agent_llm_calls_total", "LLM calls", ["model"])
+LLM_ERRORS = Counter("agent_llm_errors_total", "LLM calls that raised", ["model"])
+LLM_TOKENS = Counter("agent_llm_tokens_total", "LLM tokens used", ["model", "type"])
+
+MCP_LATENCY = Histogram("mcp_rpc_latency_seconds", "MCP tool call round-trip time",
+                        ["server", "tool"])
+MCP_ERRORS = Counter("mcp_rpc_errors_total", "MCP tool calls that failed", ["server", "tool"])
+
+
+def _model_name(serialized, kwargs) -> str:
+    params = kwargs.get("invocation_params") or {}
+    return str(params.get("model") or params.get("model_name")
+               or (serialized or {}).get("name") or "unknown")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records tool and LLM timings into the module metrics.
+    Create one per agent run: it also counts that run's LLM turns and tokens.
+    """
+
+    # Only does dict updates, no need to hop to a thread
+    run_inline = True
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._started = {}  # run_id -> (name, start time)
+
+    # LLM calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = (_model_name(serialized, kwargs), time.perf_counter())
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = (_model_name(serialized, kwargs), time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, started = self._started.pop(run_id, ("unknown", time.perf_counter()))
+        LLM_LATENCY.observe(model, value=time.perf_counter() - started)
+        LLM_CALLS.inc(model)
+        self.llm_calls += 1
+
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+                    LLM_TOKENS.inc(model, "input", amount=usage.get("input_tokens", 0))
+                    LLM_TOKENS.inc(model, "output", amount=usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model, _ = self._started.pop(run_id, ("unknown", 0))
+        LLM_ERRORS.inc(model)
+
+    # Tool calls
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._started[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, started = self._started.pop(run_id, ("unknown", time.perf_counter()))
+        TOOL_LATENCY.observe(name, value=time.perf_counter() - started)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        name, started = self._started.pop(run_id, ("unknown", time.perf_counter()))
+        TOOL_LATENCY.observe(name, value=time.perf_counter() - started)
+        TOOL_ERRORS.inc(name)
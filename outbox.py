@@ -0,0 +1,369 @@
+"""
+Outbox - Background email delivery for send_email (tool and MCP server)
+send() stores the message and returns at once; a worker thread delivers
+queued messages in batches over one reused, authenticated SMTP connection,
+retrying temporary failures with backoff. The queue lives in SQLite, so
+delivery status is visible to every process and survives restarts.
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+import sqlite3
+import smtplib
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from metrics import Counter
+
+# Settings
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_AUTH = os.getenv("SMTP_AUTH", "true").lower() == "true"       # login with EMAIL_PASSWORD
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "15"))
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))    # close the connection after
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "./outbox.sqlite")
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "20"))                # messages claimed at once
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF = float(os.getenv("OUTBOX_BACKOFF", "2"))           # seconds, doubled per attempt
+
+# A claimed message not finished by then was lost with its worker: retry it.
+# Each claim is renewed right before its send, so this only has to cover
+# one message (connection check, send, one reconnect), not a whole batch
+CLAIM_TIMEOUT = 300
+# Pause after an unexpected worker error (e.g. database locked), doubled up to the max
+WORKER_ERROR_BACKOFF = 1.0
+WORKER_ERROR_BACKOFF_MAX = 60.0
+
+# Metrics
+EMAILS = Counter("outbox_emails_total", "Outbox deliveries, by result", ["result"])
+SMTP_CONNECTIONS = Counter("outbox_smtp_connections_total", "SMTP connections opened")
+WORKER_ERRORS = Counter("outbox_worker_errors_total", "Unexpected errors in the outbox worker loop")
+
+
+def sender():
+    return os.getenv("EMAIL_ADDRESS")
+
+
+def configuration_error():
+    """Why email can't be sent, or None when it's configured"""
+    if not sender() or (SMTP_AUTH and not os.getenv("EMAIL_PASSWORD")):
+        return "Email not configured. Set EMAIL_ADDRESS and EMAIL_PASSWORD in .env file"
+    return None
+
+
+def build_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = sender()
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def _permanent(error: Exception) -> bool:
+    """5xx replies and refused recipients won't succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and code >= 500
+
+
+class Outbox:
+    """
+    Queued messages in a local SQLite file, delivered by a worker thread.
+
+    Status per message: queued -> sending -> sent, or back to queued (with
+    a later next_attempt) on a temporary failure, or failed for good.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+        self._smtp = None
+        self._smtp_used = 0.0
+        # Autocommit mode: transactions are opened explicitly (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id TEXT PRIMARY KEY,
+                to_email TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                claimed_at REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                sent_at REAL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)"
+        )
+
+    # QUEUE
+
+    def send(self, to_email: str, subject: str, body: str) -> str:
+        """Queue a message for delivery -> message id"""
+        message_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (id, to_email, subject, body, status, next_attempt, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (message_id, to_email, subject, body, now, now)
+            )
+        EMAILS.inc("queued")
+        self.start()
+        self._wake.set()
+        return message_id
+
+    def status(self, message_id: str):
+        """Delivery status of a message, or None if unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, to_email, subject, status, attempts, last_error, created_at, sent_at "
+                "FROM outbox WHERE id = ?", (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "to_email", "subject", "status", "attempts", "last_error", "created_at", "sent_at")
+        return dict(zip(keys, row))
+
+    def recent(self, limit: int = 10) -> list:
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM outbox ORDER BY created_at DESC LIMIT ?", (limit,)
+            )]
+        return [self.status(message_id) for message_id in ids]
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN ('queued', 'sending')"
+            ).fetchone()[0]
+
+    def _claim(self) -> list:
+        """
+        Take up to OUTBOX_BATCH due messages (atomically across processes)
+        -> rows of (id, to_email, subject, body, attempts, claimed_at)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, to_email, subject, body, attempts FROM outbox "
+                    "WHERE (status = 'queued' AND next_attempt <= ?) "
+                    "OR (status = 'sending' AND claimed_at < ?) "
+                    "ORDER BY next_attempt LIMIT ?",
+                    (now, now - CLAIM_TIMEOUT, OUTBOX_BATCH)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                    [(now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [row + (now,) for row in rows]
+
+    def _renew(self, message_id: str, claimed_at: float):
+        """
+        Restart a claim's timeout just before sending -> the new claim time,
+        or None if the claim expired and another worker has taken the message
+        """
+        now = time.time()
+        with self._lock:
+            renewed = self._conn.execute(
+                "UPDATE outbox SET claimed_at = ? "
+                "WHERE id = ? AND status = 'sending' AND claimed_at = ?",
+                (now, message_id, claimed_at)
+            ).rowcount
+        return now if renewed else None
+
+    def _finish(self, message_id: str, attempts: int, error: Exception = None):
+        if error is None:
+            status, next_attempt, result = "sent", None, "sent"
+        elif _permanent(error) or attempts >= OUTBOX_MAX_ATTEMPTS:
+            status, next_attempt, result = "failed", None, "failed"
+        else:
+            delay = OUTBOX_BACKOFF * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+            status, next_attempt, result = "queued", time.time() + delay, "retry"
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, claimed_at = NULL, "
+                "next_attempt = COALESCE(?, next_attempt), "
+                "sent_at = CASE WHEN ? = 'sent' THEN ? ELSE sent_at END WHERE id = ?",
+                (status, attempts, str(error) if error else None, next_attempt,
+                 status, time.time(), message_id)
+            )
+        EMAILS.inc(result)
+
+    def _next_due(self):
+        """Seconds until the next queued message is due, or None if there is none"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt) FROM outbox WHERE status = 'queued'"
+            ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    # SMTP
+
+    def _connection(self) -> smtplib.SMTP:
+        """The open SMTP connection if it's still alive, else a new authenticated one"""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close()
+
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_AUTH:
+                smtp.login(sender(), os.getenv("EMAIL_PASSWORD"))
+        except Exception:
+            smtp.close()
+            raise
+        SMTP_CONNECTIONS.inc()
+        self._smtp = smtp
+        return smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    def _deliver(self, batch):
+        for message_id, to_email, subject, body, attempts, claimed_at in batch:
+            # A slow batch can outlive CLAIM_TIMEOUT: never send a message
+            # another worker has claimed since
+            if self._renew(message_id, claimed_at) is None:
+                continue
+
+            attempts += 1
+            try:
+                smtp = self._connection()
+                try:
+                    smtp.send_message(build_message(to_email, subject, body))
+                except smtplib.SMTPServerDisconnected:
+                    # Dropped while idle between checks: reconnect once
+                    self._close()
+                    self._connection().send_message(build_message(to_email, subject, body))
+            except Exception as e:
+                # A rejected message leaves the connection usable; anything else may not
+                if not isinstance(e, smtplib.SMTPResponseException):
+                    self._close()
+                self._finish(message_id, attempts, e)
+                continue
+
+            # Sent: recorded outside the try above, so a failed write never puts
+            # the message back in the queue, and retried until it sticks
+            self._smtp_used = time.monotonic()
+            self._record_sent(message_id, attempts)
+
+    def _record_sent(self, message_id: str, attempts: int):
+        pause = WORKER_ERROR_BACKOFF
+        while True:
+            try:
+                self._finish(message_id, attempts)
+                return
+            except sqlite3.Error as e:
+                self._worker_error(e, pause)
+                pause = min(pause * 2, WORKER_ERROR_BACKOFF_MAX)
+
+    # WORKER
+
+    def start(self):
+        """Start the delivery worker in this process (once)"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="outbox", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        pause = WORKER_ERROR_BACKOFF
+        while True:
+            try:
+                self._step()
+                pause = WORKER_ERROR_BACKOFF
+            except Exception as e:
+                # Keep the worker alive (e.g. "database is locked"); messages it
+                # had claimed are picked up again after CLAIM_TIMEOUT
+                self._close()
+                self._worker_error(e, pause)
+                pause = min(pause * 2, WORKER_ERROR_BACKOFF_MAX)
+
+    def _worker_error(self, error: Exception, pause: float):
+        # stderr: stdout is the protocol channel when this runs in the MCP server
+        WORKER_ERRORS.inc()
+        print(f"⚠ Outbox worker error ({type(error).__name__}: {error}), retrying in {pause:g}s",
+              file=sys.stderr)
+        time.sleep(pause)
+
+    def _step(self):
+        """Deliver one batch, or wait until something is due"""
+        batch = self._claim()
+        if batch:
+            self._deliver(batch)
+            return
+
+        # Nothing due: sleep until the next retry, a new message or idle timeout
+        due = self._next_due()
+        timeout = SMTP_IDLE_SECONDS if due is None else min(due, SMTP_IDLE_SECONDS)
+        if self._smtp is not None:
+            idle_left = SMTP_IDLE_SECONDS - (time.monotonic() - self._smtp_used)
+            if idle_left <= 0:
+                self._close()
+            else:
+                timeout = min(timeout, idle_left)
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_outbox() -> Outbox:
+    """Shared outbox for this process"""
+    global _outbox
+
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox()
+
+    return _outbox
+
+
+def resume():
+    """Start the worker if earlier runs left messages undelivered (startup)"""
+    outbox = get_outbox()
+    if outbox.pending():
+        outbox.start()
+
+
+def describe(status: dict) -> str:
+    """One line of delivery status for a tool result"""
+    line = f"{status['id']}: {status['status']} - to {status['to_email']}, \"{status['subject']}\""
+    if status["status"] != "sent" and status["attempts"]:
+        line += f" (attempts: {status['attempts']}"
+        line += f", last error: {status['last_error']})" if status["last_error"] else ")"
+    return line
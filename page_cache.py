@@ -0,0 +1,293 @@
+"""
+Page Cache - Disk-backed HTTP cache for web_scraper (SQLite)
+Keeps the raw bytes (content-addressed, shared by identical pages) and the
+extracted text of each URL. Honors Cache-Control / Expires; stale pages are
+revalidated with If-None-Match / If-Modified-Since, so an unchanged page
+costs a 304 instead of a download and reparse.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from metrics import Counter
+
+# Settings
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "./page_cache.sqlite")
+PAGE_CACHE_MAX_MB = float(os.getenv("PAGE_CACHE_MAX_MB", "128"))
+PAGE_CACHE_DEFAULT_TTL = float(os.getenv("PAGE_CACHE_DEFAULT_TTL", "300"))  # no freshness headers
+
+# Metrics
+PAGE_CACHE_LOOKUPS = Counter("page_cache_lookups_total",
+                             "web_scraper page cache lookups, by result", ["result"])
+
+# Last-access times from get() are written in batches, not on every hit
+ACCESS_FLUSH_SECONDS = 30
+ACCESS_FLUSH_SIZE = 256
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*(s-maxage|max-age)\s*=\s*\"?(\d+)", re.I)
+
+
+def _http_date(value: str):
+    """Timestamp of an HTTP date header, or None"""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness(headers, now: float = None):
+    """
+    Seconds a response may be used without revalidating, from its headers.
+    None if it must not be stored at all (Cache-Control: no-store).
+    """
+    now = now or time.time()
+    cache_control = headers.get("Cache-Control", "").lower()
+
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+
+    ages = dict((name.lower(), int(seconds)) for name, seconds in _MAX_AGE.findall(cache_control))
+    if ages:
+        seconds = ages.get("s-maxage", ages.get("max-age"))
+        return max(0.0, seconds - float(headers.get("Age", "0") or 0))
+
+    if "Expires" in headers:
+        expires = _http_date(headers["Expires"])
+        date = _http_date(headers.get("Date", "")) or now
+        return max(0.0, expires - date) if expires else 0.0
+
+    return PAGE_CACHE_DEFAULT_TTL
+
+
+class CachedPage:
+    """One stored URL: validators, freshness, raw bytes and extracted text"""
+
+    def __init__(self, url, etag, last_modified, expires_at, complete, encoding,
+                 text, max_chars, content):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.complete = bool(complete)   # body stored as far as the byte cap, not cut off early
+        self.encoding = encoding
+        self.text = text
+        self.max_chars = max_chars
+        self.content = content
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Pages by URL in a local SQLite file.
+
+    - bodies: raw bytes keyed by SHA-256, so identical pages are stored once
+    - pages: URL -> body hash, validators, expiry and extracted text
+    - Bounded by total stored bytes; least recently used pages are evicted
+      first, then bodies no page refers to
+    - Triggers keep the running byte total (stats) and drop a body when its
+      last page goes, so writes never scan the whole cache
+    """
+
+    def __init__(self, path: str = PAGE_CACHE_PATH, max_mb: float = PAGE_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._touched = {}  # url -> last access not written yet
+        self._flushed = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                complete INTEGER NOT NULL,
+                encoding TEXT,
+                text TEXT NOT NULL,
+                max_chars INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_access ON pages (last_access);
+            CREATE INDEX IF NOT EXISTS pages_hash ON pages (hash);
+
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                size INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats (id, size) VALUES (0,
+                (SELECT COALESCE(SUM(size), 0) FROM bodies) +
+                (SELECT COALESCE(SUM(size), 0) FROM pages));
+
+            CREATE TRIGGER IF NOT EXISTS bodies_ai AFTER INSERT ON bodies BEGIN
+                UPDATE stats SET size = size + new.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS bodies_ad AFTER DELETE ON bodies BEGIN
+                UPDATE stats SET size = size - old.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+                UPDATE stats SET size = size + new.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+                UPDATE stats SET size = size - old.size WHERE id = 0;
+                DELETE FROM bodies WHERE hash = old.hash
+                    AND NOT EXISTS (SELECT 1 FROM pages WHERE hash = old.hash);
+            END;
+            CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE OF size, hash ON pages BEGIN
+                UPDATE stats SET size = size + new.size - old.size WHERE id = 0;
+                DELETE FROM bodies WHERE hash = old.hash AND old.hash != new.hash
+                    AND NOT EXISTS (SELECT 1 FROM pages WHERE hash = old.hash);
+            END;
+        """)
+        self._conn.commit()
+
+    def get(self, url: str):
+        """Stored page (fresh or stale), or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.url, p.etag, p.last_modified, p.expires_at, p.complete, "
+                "p.encoding, p.text, p.max_chars, b.content "
+                "FROM pages p JOIN bodies b ON b.hash = p.hash WHERE p.url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._touched[url] = time.time()
+            if (len(self._touched) >= ACCESS_FLUSH_SIZE
+                    or time.monotonic() - self._flushed >= ACCESS_FLUSH_SECONDS):
+                self._flush_access()
+                self._conn.commit()
+
+        return CachedPage(*row)
+
+    def _flush_access(self):
+        """Write the batched last-access times (before eviction reads them)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE pages SET last_access = ? WHERE url = ?",
+                [(accessed, url) for url, accessed in self._touched.items()]
+            )
+            self._touched.clear()
+        self._flushed = time.monotonic()
+
+    def put(self, url: str, headers, content: bytes, complete: bool,
+            encoding: str, text: str, max_chars: int):
+        """Store a downloaded page (skipped when the response says no-store)"""
+        ttl = freshness(headers)
+        if ttl is None:
+            self.delete(url)
+            return
+
+        digest = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO bodies (hash, content, size) VALUES (?, ?, ?)",
+                (digest, content, len(content))
+            )
+            # Upsert, not REPLACE: REPLACE's implicit delete skips the triggers
+            self._conn.execute(
+                "INSERT INTO pages (url, hash, etag, last_modified, expires_at, "
+                "complete, encoding, text, max_chars, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+                "hash = excluded.hash, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, expires_at = excluded.expires_at, "
+                "complete = excluded.complete, encoding = excluded.encoding, "
+                "text = excluded.text, max_chars = excluded.max_chars, "
+                "size = excluded.size, last_access = excluded.last_access",
+                (url, digest, headers.get("ETag"), headers.get("Last-Modified"), now + ttl,
+                 int(complete), encoding, text, max_chars, len(text.encode()), now)
+            )
+            self._touched.pop(url, None)
+            self._evict()
+            self._conn.commit()
+
+    def revalidated(self, url: str, headers):
+        """The server answered 304: extend freshness from the new headers"""
+        ttl = freshness(headers)
+        if ttl is None:
+            self.delete(url)
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET expires_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE url = ?",
+                (time.time() + ttl, headers.get("ETag"), headers.get("Last-Modified"), url)
+            )
+            self._conn.commit()
+
+    def delete(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._touched.pop(url, None)
+            self._conn.commit()
+
+    def _size(self) -> int:
+        """Stored bytes (bodies + text), kept up to date by the triggers"""
+        return self._conn.execute("SELECT size FROM stats WHERE id = 0").fetchone()[0]
+
+    def _evict(self):
+        total = self._size()
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% of the limit so we don't evict on every insert
+        self._flush_access()
+        target = int(self.max_bytes * 0.9)
+        while total > target:
+            stale = self._conn.execute(
+                "SELECT url FROM pages ORDER BY last_access LIMIT 32"
+            ).fetchall()
+            if not stale:
+                break
+            self._conn.executemany("DELETE FROM pages WHERE url = ?", stale)
+            total = self._size()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM bodies")
+            self._touched.clear()
+            self._conn.commit()
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+def get_page_cache():
+    """Shared cache instance if PAGE_CACHE_ENABLED, else None"""
+    global _page_cache
+
+    if PAGE_CACHE_ENABLED and _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache()
+
+    return _page_cache
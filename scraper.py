@@ -0,0 +1,444 @@
+"""
+Scraper - Streaming text extraction for the web_scraper tool
+Reads a page chunk by chunk (never more than SCRAPER_MAX_BYTES), parses it
+incrementally with lxml when installed (html.parser otherwise) and stops
+downloading and parsing as soon as SCRAPER_MAX_CHARS of text are collected.
+Pages go through the on-disk page cache (page_cache.py) when it's enabled.
+scrape_many fetches several URLs at once on the async client, politely
+(a few connections per host) and within an overall deadline.
+"""
+
+import os
+import re
+import codecs
+import asyncio
+import threading
+from html.parser import HTMLParser
+import http_client
+from page_cache import get_page_cache, PAGE_CACHE_LOOKUPS
+
+# Settings
+SCRAPER_MAX_CHARS = int(os.getenv("SCRAPER_MAX_CHARS", "1000"))        # text returned per page
+SCRAPER_MAX_BYTES = int(os.getenv("SCRAPER_MAX_BYTES", str(1024 * 1024)))  # bytes read per page
+SCRAPER_CHUNK_SIZE = int(os.getenv("SCRAPER_CHUNK_SIZE", str(16 * 1024)))
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "auto")                   # auto | lxml | html.parser
+SCRAPE_MANY_MAX_URLS = int(os.getenv("SCRAPE_MANY_MAX_URLS", "10"))     # URLs per scrape_many call
+SCRAPE_MANY_CONCURRENCY = int(os.getenv("SCRAPE_MANY_CONCURRENCY", "8"))  # pages fetched at once
+SCRAPE_MANY_PER_HOST = int(os.getenv("SCRAPE_MANY_PER_HOST", "2"))      # politeness, per host
+SCRAPE_MANY_DEADLINE = float(os.getenv("SCRAPE_MANY_DEADLINE", "12"))   # seconds for the whole batch
+
+# Elements whose text is never part of the page content
+SKIP_TAGS = {"script", "style", "template", "nav", "header", "footer"}
+
+# Bytes searched for a <meta> charset when the headers don't give one
+PRESCAN_BYTES = 1024
+
+_CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+_META_CHARSET = re.compile(rb"<meta[^>]+?charset\s*=\s*[\"']?\s*([\w.:-]+)", re.I)
+# Everything str.splitlines() breaks on
+_LINE_BREAK = re.compile("[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"),
+         (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _lxml_available() -> bool:
+    try:
+        import lxml.etree  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+PARSER = "lxml" if SCRAPER_PARSER in ("auto", "lxml") and _lxml_available() else "html.parser"
+
+
+# TEXT COLLECTION
+
+class _Text:
+    """
+    Non-empty, stripped lines of page text, built as the parser emits it.
+    Same output as BeautifulSoup get_text() + line cleanup, without a tree.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.lines = []
+        self.size = 0       # characters in lines, plus newlines between them
+        self.partial = ""   # text after the last line break
+        self.skip = 0       # depth inside SKIP_TAGS elements
+        self.done = False   # collected enough, stop reading
+
+    def start(self, tag: str):
+        if tag.lower() in SKIP_TAGS:
+            self.skip += 1
+
+    def end(self, tag: str):
+        if self.skip and tag.lower() in SKIP_TAGS:
+            self.skip -= 1
+
+    def data(self, text: str):
+        if self.skip or self.done:
+            return
+        *complete, self.partial = _LINE_BREAK.split(self.partial + text)
+        for line in complete:
+            self._add(line)
+        # A long line with no breaks yet (e.g. minified HTML) also counts
+        if not self.done and self.size + len(self.partial.strip()) > self.max_chars:
+            self.done = True
+
+    def _add(self, line: str):
+        line = line.strip()
+        if line:
+            self.size += len(line) + (1 if self.lines else 0)
+            self.lines.append(line)
+            if self.size > self.max_chars:
+                self.done = True
+
+    def result(self) -> str:
+        self._add(self.partial)
+        self.partial = ""
+        text = "\n".join(self.lines)
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars] + "..."
+        return text
+
+
+class _StdlibParser(HTMLParser):
+    """html.parser events -> _Text"""
+
+    def __init__(self, text: _Text):
+        super().__init__(convert_charrefs=True)
+        self.text = text
+
+    def handle_starttag(self, tag, attrs):
+        self.text.start(tag)
+
+    def handle_endtag(self, tag):
+        self.text.end(tag)
+
+    def handle_data(self, data):
+        self.text.data(data)
+
+
+class _LxmlTarget:
+    """lxml parser target events -> _Text"""
+
+    def __init__(self, text: _Text):
+        self.text = text
+
+    def start(self, tag, attrib):
+        self.text.start(tag)
+
+    def end(self, tag):
+        self.text.end(tag)
+
+    def data(self, data):
+        self.text.data(data)
+
+    def close(self):
+        return None
+
+
+class TextExtractor:
+    """
+    Incremental page -> text. feed() byte chunks until .done (or the body
+    ends), then text(). Nothing is kept beyond the text collected so far.
+    Without an encoding (from the headers), the first PRESCAN_BYTES are
+    held back and sniffed for a BOM or <meta> charset before decoding.
+    """
+
+    def __init__(self, max_chars: int = SCRAPER_MAX_CHARS, encoding: str = None,
+                 parser: str = None):
+        self._text = _Text(max_chars)
+        self._head = bytearray()
+        self._decoder = None
+        self.encoding = None
+        if encoding:
+            self._begin(_codec(encoding))
+        self.parser = parser or PARSER
+
+        if self.parser == "lxml":
+            import lxml.etree
+            self._parser = lxml.etree.HTMLParser(target=_LxmlTarget(self._text),
+                                                 recover=True, no_network=True)
+        else:
+            self._parser = _StdlibParser(self._text)
+
+    @property
+    def done(self) -> bool:
+        return self._text.done
+
+    def _begin(self, encoding: str):
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def feed(self, chunk: bytes):
+        if self.done:
+            return
+        if self._decoder is None:
+            self._head.extend(chunk)
+            if len(self._head) < PRESCAN_BYTES:
+                return
+            chunk = bytes(self._head)
+            self._head = None
+            self._begin(sniff_encoding(chunk))
+        data = self._decoder.decode(chunk)
+        if data:
+            self._parser.feed(data)
+
+    def text(self) -> str:
+        if not self.done:
+            if self._decoder is None:
+                # Body shorter than PRESCAN_BYTES
+                head = bytes(self._head)
+                self._head = None
+                self._begin(sniff_encoding(head))
+                if head:
+                    self._parser.feed(self._decoder.decode(head))
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self._parser.feed(tail)
+            try:
+                self._parser.close()
+            except Exception:
+                # lxml raises on pages with no parsable content at all
+                pass
+        return self._text.result()
+
+
+def _codec(encoding: str) -> str:
+    try:
+        return codecs.lookup(encoding or "utf-8").name
+    except LookupError:
+        return "utf-8"
+
+
+def sniff_encoding(head: bytes) -> str:
+    """
+    Encoding of a page from its first bytes: BOM, then <meta charset> or
+    http-equiv Content-Type, then UTF-8 if they decode as UTF-8, else
+    windows-1252 (what BeautifulSoup's detector settles on)
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    match = _META_CHARSET.search(head)
+    if match:
+        encoding = _codec(match.group(1).decode("ascii"))
+        # A <meta> read as ASCII can't really be UTF-16
+        return "utf-8" if encoding.startswith("utf-16") else encoding
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def charset(headers) -> str:
+    """Charset declared in the Content-Type header, or None"""
+    match = _CHARSET.search(headers.get("Content-Type", ""))
+    return match.group(1) if match else None
+
+
+def extract_text(chunks, max_chars: int = SCRAPER_MAX_CHARS, encoding: str = None,
+                 parser: str = None) -> str:
+    """Page text from an iterable of byte chunks, reading only as far as needed"""
+    extractor = TextExtractor(max_chars, encoding, parser)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    return extractor.text()
+
+
+# FETCH
+
+def scrape(url: str, max_chars: int = SCRAPER_MAX_CHARS,
+           max_bytes: int = SCRAPER_MAX_BYTES) -> str:
+    """Text of a web page: at most max_chars, reading at most max_bytes"""
+    cache = get_page_cache()
+    cached = cache.get(url) if cache is not None else None
+
+    if cached is not None and cached.fresh:
+        text = _cached_text(cached, max_chars)
+        if text is not None:
+            PAGE_CACHE_LOOKUPS.inc("fresh")
+            return text
+
+    # Stale (or stored for a smaller max_chars): ask the server if it changed
+    validators = cached.validators() if cached is not None else {}
+    with http_client.stream(url, max_bytes=max_bytes, chunk_size=SCRAPER_CHUNK_SIZE,
+                            headers=validators) as (response, chunks):
+        if response.status_code == 304 and cached is not None:
+            text = _cached_text(cached, max_chars)
+            if text is not None:
+                cache.revalidated(url, response.headers)
+                PAGE_CACHE_LOOKUPS.inc("revalidated")
+                return text
+        else:
+            response.raise_for_status()
+            if cache is not None:
+                PAGE_CACHE_LOOKUPS.inc("miss")
+            return _download(url, response, chunks, max_chars, cache)
+
+    # 304, but the stored bytes stop short of max_chars: fetch it in full
+    with http_client.stream(url, max_bytes=max_bytes,
+                            chunk_size=SCRAPER_CHUNK_SIZE) as (response, chunks):
+        response.raise_for_status()
+        PAGE_CACHE_LOOKUPS.inc("miss")
+        return _download(url, response, chunks, max_chars, cache)
+
+
+def _download(url: str, response, chunks, max_chars: int, cache) -> str:
+    """Extract the text of a streamed response, storing the page if cacheable"""
+    extractor = TextExtractor(max_chars, charset(response.headers))
+    body = bytearray()
+
+    for chunk in chunks:
+        if cache is not None:
+            body.extend(chunk)
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+
+    text = extractor.text()
+    if cache is not None and response.status_code == 200:
+        cache.put(url, response.headers, bytes(body), not extractor.done,
+                  extractor.encoding, text, max_chars)
+    return text
+
+
+def _cached_text(cached, max_chars: int):
+    """Text of a stored page for max_chars, or None if the stored bytes are too short"""
+    if max_chars == cached.max_chars:
+        return cached.text
+
+    extractor = TextExtractor(max_chars, cached.encoding)
+    extractor.feed(cached.content)
+    if extractor.done or cached.complete:
+        return extractor.text()
+    return None
+
+
+# ASYNC (scrape_many)
+
+# Per-host politeness limits
+_host_slots = http_client.HostSlots(SCRAPE_MANY_PER_HOST)
+
+
+async def ascrape(url: str, max_chars: int = SCRAPER_MAX_CHARS,
+                  max_bytes: int = SCRAPER_MAX_BYTES) -> str:
+    """Async scrape(): same page cache and extraction, on the httpx client"""
+    cache = get_page_cache()
+    cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+
+    if cached is not None and cached.fresh:
+        text = _cached_text(cached, max_chars)
+        if text is not None:
+            PAGE_CACHE_LOOKUPS.inc("fresh")
+            return text
+
+    validators = cached.validators() if cached is not None else {}
+    async with _host_slots.hold(url):
+        async with http_client.astream(url, max_bytes=max_bytes, chunk_size=SCRAPER_CHUNK_SIZE,
+                                       headers=validators) as (response, chunks):
+            if response.status_code == 304 and cached is not None:
+                text = _cached_text(cached, max_chars)
+                if text is not None:
+                    await asyncio.to_thread(cache.revalidated, url, response.headers)
+                    PAGE_CACHE_LOOKUPS.inc("revalidated")
+                    return text
+            else:
+                response.raise_for_status()
+                if cache is not None:
+                    PAGE_CACHE_LOOKUPS.inc("miss")
+                return await _adownload(url, response, chunks, max_chars, cache)
+
+        async with http_client.astream(url, max_bytes=max_bytes,
+                                       chunk_size=SCRAPER_CHUNK_SIZE) as (response, chunks):
+            response.raise_for_status()
+            PAGE_CACHE_LOOKUPS.inc("miss")
+            return await _adownload(url, response, chunks, max_chars, cache)
+
+
+async def _adownload(url: str, response, chunks, max_chars: int, cache) -> str:
+    """Async _download()"""
+    extractor = TextExtractor(max_chars, charset(response.headers))
+    body = bytearray()
+
+    async for chunk in chunks:
+        if cache is not None:
+            body.extend(chunk)
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+
+    text = extractor.text()
+    if cache is not None and response.status_code == 200:
+        await asyncio.to_thread(cache.put, url, response.headers, bytes(body),
+                                not extractor.done, extractor.encoding, text, max_chars)
+    return text
+
+
+async def ascrape_many(urls, deadline: float = SCRAPE_MANY_DEADLINE) -> list:
+    """
+    Scrape several URLs concurrently -> [(url, text, error)] in the given order.
+    Pages not finished by the deadline are cancelled and reported as timed
+    out; the others are still returned.
+    """
+    urls = list(dict.fromkeys(urls))[:SCRAPE_MANY_MAX_URLS]
+    slots = asyncio.Semaphore(SCRAPE_MANY_CONCURRENCY)
+
+    async def fetch(url):
+        async with slots:
+            return await ascrape(url)
+
+    tasks = [asyncio.ensure_future(fetch(url)) for url in urls]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    # Let cancelled downloads close their connections
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for url, task in zip(urls, tasks):
+        if task in pending:
+            results.append((url, None, f"no response within {deadline:g}s"))
+        elif task.exception() is not None:
+            error = task.exception()
+            results.append((url, None, (str(error) or type(error).__name__).splitlines()[0]))
+        else:
+            results.append((url, task.result(), None))
+    return results
+
+
+# Sync callers share one persistent loop in a background thread, so its
+# httpx client and connections are reused across calls
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="scrape-many", daemon=True).start()
+
+    return _loop
+
+
+def scrape_many(urls, deadline: float = SCRAPE_MANY_DEADLINE) -> list:
+    """Sync ascrape_many() for callers without an event loop (tool threads)"""
+    return asyncio.run_coroutine_threadsafe(ascrape_many(urls, deadline), _get_loop()).result()
+
+
+def format_results(results) -> str:
+    """scrape_many results as one text block per URL"""
+    blocks = []
+    for number, (url, text, error) in enumerate(results, 1):
+        blocks.append(f"[{number}] {url}\n" + (text if error is None else f"(failed: {error})"))
+    return "\n\n".join(blocks)
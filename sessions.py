@@ -0,0 +1,102 @@
+"""
+Conversation Sessions - Server-side chat history for /query
+Keeps each session's history under a token budget and evicts idle sessions
+"""
+
+import os
+import uuid
+import asyncio
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from ttl_cache import TTLCache
+
+# Settings
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+HISTORY_SUMMARIZE = os.getenv("HISTORY_SUMMARIZE", "false").lower() == "true"
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), no tokenizer call"""
+    return len(text) // 4 + 1
+
+
+class Session:
+    """One conversation: recent turns plus a summary of older ones"""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.history = []   # alternating HumanMessage / AIMessage
+        self.summary = ""   # condensed older turns (if summarization is on)
+        # Turns of the same session run one at a time
+        self.lock = asyncio.Lock()
+
+    def messages(self) -> list:
+        """History to put in the prompt"""
+        if self.summary:
+            return [SystemMessage(f"Summary of the earlier conversation: {self.summary}")] + self.history
+        return list(self.history)
+
+    def tokens(self) -> int:
+        return count_tokens(self.summary) + sum(count_tokens(m.content) for m in self.history)
+
+    def add_turn(self, question: str, answer: str, token_budget: int = HISTORY_TOKEN_BUDGET) -> list:
+        """
+        Append a question/answer pair, then drop the oldest turns until the
+        history fits the token budget. Returns the dropped messages.
+        """
+        self.history.extend([HumanMessage(question), AIMessage(answer)])
+
+        dropped = []
+        # Always keep the latest turn, even if it alone is over budget
+        while len(self.history) > 2 and self.tokens() > token_budget:
+            dropped.extend(self.history[:2])
+            del self.history[:2]
+
+        return dropped
+
+
+class SessionStore:
+    """
+    Sessions by id, LRU + idle TTL bounded so memory stays flat with
+    many users. Touching a session (each query) renews its TTL.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX_COUNT, idle_ttl: float = SESSION_IDLE_TTL):
+        self._sessions = TTLCache(max_size=max_sessions, default_ttl=idle_ttl)
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def create(self) -> Session:
+        """Start a new session under a fresh id"""
+        session = Session(self.new_id())
+        self._sessions.set(session.id, session)
+        return session
+
+    def get(self, session_id: str):
+        """Return the session (renewing its TTL), or None if unknown or expired"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.set(session_id, session)
+        return session
+
+    def delete(self, session_id: str):
+        self._sessions.delete(session_id)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+async def trim_history(session: Session, question: str, answer: str, summarize=None):
+    """
+    Record a turn and keep the session under budget. When a summarize
+    coroutine is given, dropped turns are folded into the session summary;
+    otherwise they are simply forgotten.
+    """
+    dropped = session.add_turn(question, answer)
+
+    if dropped and summarize is not None:
+        summary = await summarize(session.summary, dropped)
+        # The summary itself gets at most a quarter of the budget
+        session.summary = summary[:HISTORY_TOKEN_BUDGET]
@@ -0,0 +1,65 @@
+"""
+Shared Services - Run the memory store and MCP servers once for all API workers
+
+Multi-worker mode:
+    python shared_services.py
+    MCP_TRANSPORT=sse CHROMA_SERVER_HOST=127.0.0.1 uvicorn api:app --workers 4
+
+Without this, every worker opens ./chroma_memory itself (concurrent SQLite
+writers) and spawns its own copy of every MCP server.
+"""
+
+import os
+import sys
+import time
+import signal
+import subprocess
+from mcp_tools import MCP_SERVERS
+
+CHROMA_HOST = os.getenv("CHROMA_SERVER_HOST", "127.0.0.1")
+CHROMA_PORT = os.getenv("CHROMA_SERVER_PORT", "8100")
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_memory")
+
+
+def service_commands() -> dict:
+    """Command line for each shared service"""
+    commands = {
+        "chroma": ["chroma", "run", "--path", CHROMA_PATH,
+                   "--host", CHROMA_HOST, "--port", CHROMA_PORT],
+    }
+
+    for name, config in MCP_SERVERS.items():
+        if config["enabled"] and "script" in config:
+            commands[f"mcp-{name}"] = [sys.executable, config["script"],
+                                       "--sse", "--port", str(config["port"])]
+
+    return commands
+
+
+def main():
+    processes = {}
+
+    def stop(*_):
+        for proc in processes.values():
+            if proc.poll() is None:
+                proc.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for name, command in service_commands().items():
+        processes[name] = subprocess.Popen(command)
+        print(f"✓ Started {name}: {' '.join(command)}")
+
+    # Exit (and stop the rest) if any service dies
+    while True:
+        for name, proc in processes.items():
+            if proc.poll() is not None:
+                print(f"✗ {name} exited with code {proc.returncode}")
+                stop()
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+SMTP Sink - Local stand-in SMTP server for trying out the email outbox
+Accepts every message (AUTH is accepted too, no STARTTLS) and prints one
+line per message; --fail-rate rejects a share of messages with a temporary
+451 error, to see retries at work, and --reject refuses recipients for good
+(550), to see permanent failures.
+
+    python smtp_sink.py --port 1025 --fail-rate 0.2 --reject bounce@example.com
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_AUTH=false uvicorn api:app
+"""
+
+import random
+import argparse
+import threading
+import socketserver
+from email import message_from_bytes
+
+# Delivered messages (for scripts that run the sink in-process)
+MESSAGES = []
+CONNECTIONS = []
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    fail_rate = 0.0
+    reject = frozenset()
+    quiet = False
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        CONNECTIONS.append(self.client_address)
+        self.reply("220 localhost smtp-sink ready")
+        sender, recipients = None, []
+
+        for raw in self.rfile:
+            command = raw.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n")
+                self.reply("250 8BITMIME")
+            elif verb == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(" <>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipient = command[8:].strip(" <>")
+                if recipient in self.reject:
+                    self.reply("550 5.1.1 Mailbox unavailable")
+                    continue
+                recipients.append(recipient)
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = bytearray()
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                    data.extend(line[1:] if line.startswith(b"..") else line)
+
+                if random.random() < self.fail_rate:
+                    self.reply("451 4.3.0 Temporary failure, try again later")
+                    continue
+
+                message = message_from_bytes(bytes(data))
+                MESSAGES.append({"from": sender, "to": recipients, "subject": message["Subject"]})
+                if not self.quiet:
+                    print(f"✓ {sender} -> {', '.join(recipients)}: {message['Subject']}")
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start(host: str = "127.0.0.1", port: int = 1025, fail_rate: float = 0.0,
+          reject=(), quiet: bool = True) -> SMTPServer:
+    """Run the sink in a background thread (stop with .shutdown()); port 0 picks a free one"""
+    handler = type("Handler", (SMTPHandler,), {"fail_rate": fail_rate,
+                                               "reject": frozenset(reject), "quiet": quiet})
+    server = SMTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="share of messages answered with a temporary 451 error")
+    parser.add_argument("--reject", nargs="*", default=[],
+                        help="recipients refused with a permanent 550 error")
+    args = parser.parse_args()
+
+    handler = type("Handler", (SMTPHandler,), {"fail_rate": args.fail_rate,
+                                               "reject": frozenset(args.reject)})
+    with SMTPServer((args.host, args.port), handler) as server:
+        print(f"✓ SMTP sink listening on {args.host}:{args.port}")
+        server.serve_forever()
@@ -0,0 +1,202 @@
+"""
+Summarizer - Extractive summaries (TF-IDF + TextRank, NumPy) for summarize_text
+Sentences are read one chunk at a time; each chunk's best sentences go on
+as candidates, and candidates are ranked again whenever they fill a chunk.
+Time is linear in the input and memory is bounded by SUMMARY_CHUNK_SENTENCES,
+so 1 MB+ documents are summarized locally instead of being sent to the LLM.
+"""
+
+import os
+import re
+from itertools import islice
+import numpy as np
+
+# Settings
+SUMMARY_SENTENCES = int(os.getenv("SUMMARY_SENTENCES", "5"))           # target length
+SUMMARY_MAX_SENTENCES = int(os.getenv("SUMMARY_MAX_SENTENCES", "20"))  # upper bound on what callers ask for
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "1500"))        # hard cap, 0 = none
+SUMMARY_CHUNK_SENTENCES = int(os.getenv("SUMMARY_CHUNK_SENTENCES", "300"))  # sentences ranked at once
+
+DAMPING = 0.85
+ITERATIONS = 50
+TOLERANCE = 1e-6
+MIN_WORDS = 4           # shorter lines (menus, headings) are never picked
+MAX_SENTENCE_CHARS = 1000
+DUPLICATE_SIMILARITY = 0.9
+
+_BOUNDARY = re.compile(r"[.!?][\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])|\n+")
+_WORD = re.compile(r"[^\W\d_]{2,}")
+
+# Words followed by a period that doesn't end the sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e",
+    "inc", "ltd", "co", "corp", "no", "fig", "approx", "dept", "est", "gen", "gov",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    "u.s", "u.k", "a.m", "p.m", "ph.d", "al", "cf", "vol", "pp", "ed",
+}
+
+STOPWORDS = set("""
+a about above after again against all am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for
+from further had has have having he her here hers herself him himself his how i if in
+into is it its itself just me more most my myself no nor not now of off on once only or
+other our ours ourselves out over own same she should so some such than that the their
+theirs them themselves then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your yours
+yourself yourselves also may might must shall one two its it's
+""".split())
+
+
+# SEGMENTATION
+
+def split_sentences(text: str):
+    """
+    Yield sentences: split after . ! ? (before a capital, digit or quote) and
+    at line breaks, but not after abbreviations or initials ("Dr.", "J.")
+    """
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        end = match.start()
+        if text[end] != "\n":
+            # Word before the period: look back from it, not forward from start,
+            # so skipped abbreviations don't make the scan quadratic
+            space = max(text.rfind(" ", start, end), text.rfind("\t", start, end))
+            word = text[max(space + 1, start):end].lstrip("(\"'")
+            if word.lower() in ABBREVIATIONS or (len(word) == 1 and word.isupper()):
+                continue
+
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
+
+
+def _fragments(text: str):
+    """Sentences, with any longer than MAX_SENTENCE_CHARS cut into pieces at spaces"""
+    for sentence in split_sentences(text):
+        while len(sentence) > MAX_SENTENCE_CHARS:
+            cut = sentence.rfind(" ", 0, MAX_SENTENCE_CHARS)
+            if cut <= 0:
+                cut = MAX_SENTENCE_CHARS
+            yield sentence[:cut].strip()
+            sentence = sentence[cut:].strip()
+        if sentence:
+            yield sentence
+
+
+def _terms(sentence: str) -> list:
+    return [w for w in _WORD.findall(sentence.lower()) if w not in STOPWORDS]
+
+
+# RANKING
+
+def _vectors(sentences) -> np.ndarray:
+    """L2-normalized TF-IDF rows, one per sentence (vocabulary of this chunk only)"""
+    vocabulary = {}
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        for term in _terms(sentence):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+
+    matrix = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1)
+
+    np.log1p(matrix, out=matrix)
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    matrix *= (np.log((1 + len(sentences)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def textrank(vectors: np.ndarray) -> np.ndarray:
+    """TextRank score per sentence over the cosine-similarity graph"""
+    count = len(vectors)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+
+    # Row-stochastic transitions; sentences with no neighbours jump anywhere
+    weights = similarity.sum(axis=1, keepdims=True)
+    transitions = np.divide(similarity, weights, out=np.full_like(similarity, 1 / count),
+                            where=weights > 0)
+
+    scores = np.full(count, 1 / count, dtype=np.float32)
+    for _ in range(ITERATIONS):
+        updated = (1 - DAMPING) / count + DAMPING * (scores @ transitions)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def _select(candidates, keep: int) -> list:
+    """
+    Best `keep` of [(position, sentence)] by TextRank, skipping near-duplicates
+    of sentences already picked; returned in document order
+    """
+    if len(candidates) <= keep:
+        return candidates
+
+    vectors = _vectors([sentence for _, sentence in candidates])
+    scores = textrank(vectors)
+
+    picked = []
+    for index in np.argsort(-scores, kind="stable"):
+        if picked and float((vectors[picked] @ vectors[index]).max()) > DUPLICATE_SIMILARITY:
+            continue
+        picked.append(int(index))
+        if len(picked) == keep:
+            break
+    return [candidates[i] for i in sorted(picked)]
+
+
+def summarize(text: str, sentences: int = SUMMARY_SENTENCES,
+              max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """
+    The `sentences` most central sentences of text, in their original order
+    (at most max_chars). Texts no longer than max_chars come back unchanged.
+    sentences is clamped to SUMMARY_MAX_SENTENCES: it sizes the chunks and
+    the candidate lists, so an unbounded value would unbound time and memory.
+    """
+    sentences = min(max(sentences, 1), SUMMARY_MAX_SENTENCES)
+    if len(text) <= (max_chars or sentences * MAX_SENTENCE_CHARS):
+        return text.strip()
+
+    chunk_size = max(SUMMARY_CHUNK_SENTENCES, sentences * 4)
+    keep = sentences * 2  # candidates kept per chunk, ranked again at the end
+
+    candidates = []
+    chunk = []
+    for position, sentence in enumerate(_fragments(text)):
+        if len(sentence.split()) < MIN_WORDS:
+            continue
+        chunk.append((position, sentence))
+
+        if len(chunk) == chunk_size:
+            candidates.extend(_select(chunk, keep))
+            chunk = []
+            if len(candidates) >= chunk_size:
+                candidates = _select(candidates, keep)
+
+    candidates.extend(_select(chunk, keep))
+
+    if not candidates:
+        # Only fragments (lists, headings): keep the first ones
+        candidates = list(enumerate(islice(_fragments(text), sentences)))
+
+    summary = []
+    length = 0
+    for _, sentence in _select(candidates, sentences):
+        if max_chars and summary and length + len(sentence) + 1 > max_chars:
+            break
+        summary.append(sentence)
+        length += len(sentence) + 1
+
+    text = " ".join(summary)
+    return text[:max_chars] if max_chars else text
@@ -0,0 +1,39 @@
+"""
+Cold import of the API stays cheap: heavy dependencies (ChromaDB, the Gemini
+client, MCP, scrapers) load on first use, not at import.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+# Generous for slow CI machines; a regression to eager loading costs far more
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "5"))
+
+# Modules that must not be imported by `import api`
+HEAVY_MODULES = ("chromadb", "langchain_google_genai", "sentence_transformers",
+                 "wikipedia", "googlesearch", "bs4", "mcp")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = f"""
+import sys, time, json
+started = time.perf_counter()
+import api
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds,
+                  "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def test_import_api_within_budget():
+    # Fresh interpreter: nothing already imported by the test session
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, capture_output=True,
+                            text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["loaded"] == [], f"imported eagerly: {report['loaded']}"
+    assert report["seconds"] < IMPORT_BUDGET_SECONDS, \
+        f"import api took {report['seconds']:.2f}s (budget {IMPORT_BUDGET_SECONDS:g}s)"
@@ -0,0 +1,116 @@
+"""
+Outbox against the local SMTP stand-in (smtp_sink): retries, status,
+connection reuse and permanent failures.
+"""
+
+import time
+import pytest
+import outbox
+import smtp_sink
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    """Start a sink on a free port and point the outbox settings at it"""
+    servers = []
+
+    def start(**options):
+        server = smtp_sink.start(port=0, **options)
+        servers.append(server)
+        monkeypatch.setattr(outbox, "SMTP_HOST", "127.0.0.1")
+        monkeypatch.setattr(outbox, "SMTP_PORT", server.server_address[1])
+        return server
+
+    monkeypatch.setenv("EMAIL_ADDRESS", "agent@example.com")
+    monkeypatch.setattr(outbox, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(outbox, "SMTP_AUTH", False)
+    monkeypatch.setattr(outbox, "OUTBOX_BACKOFF", 0.05)
+    monkeypatch.setattr(smtp_sink, "MESSAGES", [])
+    monkeypatch.setattr(smtp_sink, "CONNECTIONS", [])
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def wait_until_delivered(box: outbox.Outbox, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while box.pending() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert box.pending() == 0, "outbox did not drain"
+
+
+def test_delivers_over_one_connection(sink, tmp_path):
+    sink()
+    box = outbox.Outbox(str(tmp_path / "outbox.sqlite"))
+
+    ids = [box.send(f"user{i}@example.com", f"Subject {i}", "Hello") for i in range(10)]
+    wait_until_delivered(box)
+
+    statuses = [box.status(message_id) for message_id in ids]
+    assert all(status["status"] == "sent" and status["sent_at"] for status in statuses)
+    assert sorted(m["subject"] for m in smtp_sink.MESSAGES) == sorted(f"Subject {i}" for i in range(10))
+    assert len(smtp_sink.CONNECTIONS) == 1
+
+
+def test_temporary_failures_are_retried(sink, tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 20)
+    sink(fail_rate=0.3)
+    box = outbox.Outbox(str(tmp_path / "outbox.sqlite"))
+
+    ids = [box.send("user@example.com", f"Subject {i}", "Hello") for i in range(20)]
+    wait_until_delivered(box)
+
+    statuses = [box.status(message_id) for message_id in ids]
+    assert all(status["status"] == "sent" for status in statuses)
+    assert len(smtp_sink.MESSAGES) == 20
+    # Every retry went over the same connection: a 451 leaves it usable
+    assert len(smtp_sink.CONNECTIONS) == 1
+    assert any(status["attempts"] > 1 for status in statuses), \
+        "fail_rate 0.3 over 20 messages should force some retries"
+    assert all(status["last_error"] is None for status in statuses)
+
+
+def test_permanent_failure_is_not_retried(sink, tmp_path):
+    sink(reject={"bounce@example.com"})
+    box = outbox.Outbox(str(tmp_path / "outbox.sqlite"))
+
+    bounced = box.send("bounce@example.com", "Bounced", "Hello")
+    delivered = box.send("user@example.com", "Delivered", "Hello")
+    wait_until_delivered(box)
+
+    status = box.status(bounced)
+    assert status["status"] == "failed"
+    assert status["attempts"] == 1
+    assert "550" in status["last_error"]
+    assert box.status(delivered)["status"] == "sent"
+    assert [m["subject"] for m in smtp_sink.MESSAGES] == ["Delivered"]
+    assert "failed" in outbox.describe(status)
+
+
+def test_expired_claim_is_not_sent_twice(sink, tmp_path, monkeypatch):
+    # Two workers on one file (e.g. the API and the MCP email server),
+    # driven by hand
+    monkeypatch.setattr(outbox.Outbox, "start", lambda self: None)
+    sink()
+    path = str(tmp_path / "outbox.sqlite")
+    first, second = outbox.Outbox(path), outbox.Outbox(path)
+
+    message_id = first.send("user@example.com", "Once", "Hello")
+    stalled = first._claim()
+    # The first worker's batch outlives CLAIM_TIMEOUT; the second takes over
+    first._conn.execute("UPDATE outbox SET claimed_at = claimed_at - ?", (outbox.CLAIM_TIMEOUT + 1,))
+    taken = second._claim()
+    assert [row[0] for row in taken] == [message_id]
+
+    second._deliver(taken)
+    first._deliver(stalled)
+
+    assert [m["subject"] for m in smtp_sink.MESSAGES] == ["Once"]
+    assert first.status(message_id)["status"] == "sent"
+    assert first.status(message_id)["attempts"] == 1
+
+
+def test_unknown_message_has_no_status(tmp_path):
+    box = outbox.Outbox(str(tmp_path / "outbox.sqlite"))
+    assert box.status("nope") is None
@@ -0,0 +1,41 @@
+"""
+Local Wikipedia store lookups: exact titles, aliases and the full-text
+fallback, which must never guess an answer for an ambiguous query.
+"""
+
+import pytest
+import wiki_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return wiki_store.WikiStore(str(tmp_path / "wiki.sqlite"))
+
+
+def test_alias_and_qualified_match(store):
+    store.add("Mercury (planet)", "Mercury is the first planet from the Sun.",
+              aliases=["mercury planet"])
+
+    assert store.find("Mercury planet")[0] == "Mercury (planet)"
+    assert store.find("mercury (planet)")[0] == "Mercury (planet)"
+    assert store.find("planet mercury")[0] == "Mercury (planet)"
+
+
+def test_known_disambiguation_is_not_answered_by_full_text(store):
+    store.add_disambiguation("Mercury", ["Mercury (planet)", "Mercury (element)"])
+    store.add("Mercury (planet)", "Mercury is the first planet from the Sun.",
+              aliases=["mercury planet"])
+
+    assert store.summary("Mercury") is None
+    assert store.disambiguation("Mercury") == ["Mercury (planet)", "Mercury (element)"]
+
+
+def test_bare_query_does_not_match_a_qualified_title(store):
+    store.add("Python (programming language)", "Python is a programming language.")
+
+    assert store.find("python") is None
+    assert store.find("python programming")[0] == "Python (programming language)"
+    # Unqualified titles still match on every word
+    store.add("Paris Hilton", "Paris Hilton is a media personality.")
+    assert store.find("paris") is None
+    assert store.find("hilton paris")[0] == "Paris Hilton"
@@ -0,0 +1,169 @@
+"""
+Tool Executor - Run the tool calls of one LLM turn concurrently
+Async tools run on the event loop, sync tools (web_scraper, wikipedia, ...)
+on a dedicated thread pool. Results keep the order the LLM emitted the calls.
+"""
+
+import os
+import asyncio
+import threading
+import contextvars
+from functools import partial
+from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import PrivateAttr
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentFinish
+from langchain_core.tools import StructuredTool
+
+# Settings
+# Max tool calls of one turn running at once (1 = one after another)
+MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+# Threads for sync tools, shared by all requests of the process
+TOOL_THREADS = int(os.getenv("TOOL_THREADS", "32"))
+
+# Dedicated pool, so slow tools don't starve asyncio.to_thread users
+# (cache lookups, warmup) of the event loop's default executor
+TOOL_POOL = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="tool")
+
+
+def in_context(func, *args, **kwargs):
+    """Callable running func in a copy of the current context (callbacks, tracing)"""
+    return partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def pooled_tool(tool):
+    """
+    Sync-only structured tool -> same tool whose async path runs on TOOL_POOL.
+    Other tools are returned unchanged.
+    """
+    if not isinstance(tool, StructuredTool) or tool.coroutine is not None or tool.func is None:
+        return tool
+
+    func = tool.func
+
+    async def run_in_pool(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(TOOL_POOL, in_context(func, *args, **kwargs))
+
+    return tool.model_copy(update={"coroutine": run_in_pool})
+
+
+_pooled_tools = {}
+
+def pooled_tools(tools) -> list:
+    """pooled_tool() for a list of tools; copies are made once per tool"""
+    result = []
+    for tool in tools:
+        if id(tool) not in _pooled_tools:
+            _pooled_tools[id(tool)] = (tool, pooled_tool(tool))
+        result.append(_pooled_tools[id(tool)][1])
+    return result
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs the tool calls of a turn concurrently.
+
+    - Async runs (ainvoke / astream_events): LangChain already gathers the
+      calls; this caps how many run at once
+    - Sync runs (invoke): calls are submitted to TOOL_POOL instead of
+      running one after another
+    Steps are always returned in the order of the LLM's tool calls.
+
+    With a budget (budgets.Budget), the loop also stops once the run's
+    iterations, time or tokens reach their limit, returning a partial answer.
+    """
+
+    max_parallel_tools: int = MAX_PARALLEL_TOOLS
+    budget: Any = None
+
+    _async_slots: asyncio.Semaphore = PrivateAttr(default=None)
+    # Set while the sync path collects a turn's actions (see _iter_next_step)
+    _deferring: threading.local = PrivateAttr(default_factory=threading.local)
+
+    # BUDGET
+
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if self.budget is not None:
+            self.budget.iterations = iterations
+            reason = self.budget.exceeded()
+            if reason:
+                self.budget.stop(reason)
+                return False
+        return super()._should_continue(iterations, time_elapsed)
+
+    def _budget_answer(self, output, intermediate_steps):
+        """Replace LangChain's fixed "Agent stopped" text when a budget ran out"""
+        stopped_early = (
+            isinstance(output, AgentFinish) and output.log == ""
+            and str(output.return_values.get("output", "")).startswith("Agent stopped")
+        )
+        if self.budget is None or not stopped_early:
+            return output
+
+        # LangChain's own limits end the loop without asking us: max_iterations,
+        # or the hard timeout (max_execution_time)
+        reason = self.budget.exceeded()
+        if not reason:
+            hit_max = self.max_iterations is not None and self.budget.iterations >= self.max_iterations
+            reason = "iterations" if hit_max else "time"
+        self.budget.stop(reason)
+        return AgentFinish({"output": self.budget.stopped_answer(intermediate_steps)}, "")
+
+    def _return(self, output, intermediate_steps, run_manager=None):
+        output = self._budget_answer(output, intermediate_steps)
+        return super()._return(output, intermediate_steps, run_manager=run_manager)
+
+    async def _areturn(self, output, intermediate_steps, run_manager=None):
+        output = self._budget_answer(output, intermediate_steps)
+        return await super()._areturn(output, intermediate_steps, run_manager=run_manager)
+
+    # ASYNC PATH
+
+    async def _aperform_agent_action(self, *args, **kwargs):
+        # Turns run one after another, so a per-executor cap is a per-turn cap
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(max(self.max_parallel_tools, 1))
+
+        async with self._async_slots:
+            return await super()._aperform_agent_action(*args, **kwargs)
+
+    # SYNC PATH
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs,
+                        intermediate_steps, run_manager=None):
+        steps = super()._iter_next_step(
+            name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+        )
+        if self.max_parallel_tools <= 1:
+            yield from steps
+            return
+
+        # The parent yields the turn's actions, then one step per action;
+        # each step is computed when pulled. Hold the steps back as
+        # deferred calls and run them together.
+        deferred = []
+        slots = threading.Semaphore(self.max_parallel_tools)
+
+        def limited(call):
+            with slots:
+                return call()
+
+        self._deferring.active = True
+        try:
+            for item in steps:
+                if callable(item):
+                    deferred.append(TOOL_POOL.submit(in_context(limited, item)))
+                else:
+                    yield item
+        finally:
+            self._deferring.active = False
+
+        for future in deferred:
+            yield future.result()
+
+    def _perform_agent_action(self, *args, **kwargs):
+        if getattr(self._deferring, "active", False):
+            return partial(super()._perform_agent_action, *args, **kwargs)
+        return super()._perform_agent_action(*args, **kwargs)
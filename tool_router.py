@@ -0,0 +1,146 @@
+"""
+Tool Router - Bind only the tools relevant to a question
+Tool descriptions are embedded once; each question gets the top-k most
+similar tools plus an always-include list, so the LLM sees fewer schemas.
+"""
+
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+from metrics import Counter, Histogram
+from sessions import count_tokens
+
+# Settings (opt-in)
+TOOL_ROUTER_ENABLED = os.getenv("TOOL_ROUTER_ENABLED", "false").lower() == "true"
+TOOL_ROUTER_TOP_K = int(os.getenv("TOOL_ROUTER_TOP_K", "3"))
+TOOL_ROUTER_ALWAYS = [
+    name.strip() for name in os.getenv("TOOL_ROUTER_ALWAYS", "mcp_calculator").split(",")
+    if name.strip()
+]
+# "chroma": ChromaDB's default sentence embedding model (all-MiniLM-L6-v2)
+# "hashing": hashed bag of words, no model download
+TOOL_ROUTER_EMBEDDINGS = os.getenv("TOOL_ROUTER_EMBEDDINGS", "chroma")
+
+HASHING_DIMENSIONS = 1024
+
+# Metrics
+ROUTED_TOOLS = Histogram("tool_router_selected_tools", "Tools bound per routed request",
+                         buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20))
+SCHEMA_TOKENS = Counter("tool_router_schema_tokens_total",
+                        "Estimated tool schema tokens per LLM call, sent vs saved by routing",
+                        ["type"])
+
+
+def hashing_embed(texts) -> np.ndarray:
+    """Hashed bag-of-words vectors (word unigrams), L2-normalized"""
+    vectors = np.zeros((len(texts), HASHING_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if len(word) > 2:
+                vectors[row, zlib.crc32(word.encode()) % HASHING_DIMENSIONS] += 1
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def chroma_embed_function():
+    """ChromaDB's default embedding model as a texts -> matrix function"""
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    model = DefaultEmbeddingFunction()
+
+    def embed(texts) -> np.ndarray:
+        vectors = np.asarray(model(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    # Fail here (model missing / no network) rather than on the first request
+    embed(["warmup"])
+    return embed
+
+
+def schema_tokens(tool) -> int:
+    """Estimated prompt tokens for one tool's schema"""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    return count_tokens(json.dumps(convert_to_openai_tool(tool)))
+
+
+class Route:
+    """Tools chosen for one question, with schema token counts for metrics"""
+
+    def __init__(self, tools, sent_tokens: int, full_tokens: int):
+        self.tools = tools
+        self.sent_tokens = sent_tokens
+        self.full_tokens = full_tokens
+
+    def record(self, llm_calls: int):
+        """Count schema tokens sent / saved over the run's LLM calls"""
+        SCHEMA_TOKENS.inc("sent", amount=self.sent_tokens * llm_calls)
+        SCHEMA_TOKENS.inc("saved", amount=(self.full_tokens - self.sent_tokens) * llm_calls)
+
+
+class ToolRouter:
+    """
+    Picks tools for a question by cosine similarity to the tool descriptions.
+
+    Selected tools keep their order in the full tool list, so the same
+    selection always maps to the same cached agent runnable.
+    """
+
+    def __init__(self, tools, top_k: int = TOOL_ROUTER_TOP_K,
+                 always=TOOL_ROUTER_ALWAYS, embeddings: str = TOOL_ROUTER_EMBEDDINGS):
+        self.tools = list(tools)
+        self.top_k = top_k
+        self.always = {name for name in always if name in {t.name for t in self.tools}}
+        self.embeddings = embeddings
+        self._embed = None
+        self._matrix = None
+        self._tokens = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Embed all tool descriptions (once)"""
+        with self._lock:
+            if self._matrix is not None:
+                return
+
+            embed = hashing_embed
+            if self.embeddings == "chroma":
+                try:
+                    embed = chroma_embed_function()
+                except Exception as e:
+                    print(f"⚠ Tool router: embedding model unavailable ({e}), using hashing")
+
+            documents = [f"{t.name.replace('_', ' ')}: {t.description}" for t in self.tools]
+            self._tokens = [schema_tokens(t) for t in self.tools]
+            self._embed = embed
+            self._matrix = embed(documents)
+            print(f"✓ Tool router ready ({len(self.tools)} tools)")
+
+    def route(self, question: str, chat_history: list = None) -> Route:
+        """Top-k tools for the question (blocking: embeds the question)"""
+        self.load()
+
+        # Follow-ups ("and in Paris?") need the previous question for context
+        query = question
+        for message in reversed(chat_history or []):
+            if message.type == "human":
+                query = f"{message.content}\n{question}"
+                break
+
+        scores = self._matrix @ self._embed([query])[0]
+        ranked = np.argsort(-scores)[:self.top_k]
+
+        chosen = set(int(i) for i in ranked)
+        chosen.update(i for i, t in enumerate(self.tools) if t.name in self.always)
+        indexes = sorted(chosen)
+
+        ROUTED_TOOLS.observe(value=len(indexes))
+        return Route(
+            [self.tools[i] for i in indexes],
+            sent_tokens=sum(self._tokens[i] for i in indexes),
+            full_tokens=sum(self._tokens)
+        )
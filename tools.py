@@ -3,25 +3,34 @@ Tools for Multi-Agent System
 """
 
 import os
-import requests
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import wikipedia
+import threading
 from langchain.agents import tool
-from googlesearch import search
-from bs4 import BeautifulSoup
+from langchain_core.tools import StructuredTool
 from dotenv import load_dotenv
+import weather
+import scraper
+import wiki_store
+import web_search
+import summarizer
+import outbox
 
-
-import chromadb
-from chromadb.config import Settings
 from datetime import datetime
 import uuid
 
+# Heavy / rarely needed libraries (wikipedia, googlesearch, chromadb)
+# are imported inside the functions that use them, keeping startup fast.
+
 
 load_dotenv()
 
+
+def load_tool_dependencies():
+    """Import the lazily loaded tool libraries now (used by warmup)"""
+    import wikipedia
+    import googlesearch
+    if scraper.PARSER == "lxml":
+        import lxml.etree
+
 # CALCULATOR TOOL
 
 # @tool
@@ -57,16 +66,29 @@ def get_weather(city: str) -> str:
     Example: get_weather("San Jose")
     """
     try:
-        url = f"http://wttr.in/{city}?format=%C+%t"
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        result = response.text.strip()
-        return f"Weather in {city}: {result}"
+        # Cached per city for WEATHER_CACHE_TTL (see weather.py)
+        return weather.format_report(city, weather.fetch_conditions(city))
     
     except Exception as e:
         raise ValueError(f"Failed to get weather: {str(e)}")
 
+@tool
+def get_weather_batch(cities: list[str]) -> str:
+    """
+    Get current weather for several cities at once.
+    Use this instead of repeated get_weather calls when the user asks about
+    more than one city (e.g. comparing weather).
+    
+    Args:
+        cities: City names (e.g., ["London", "Paris", "Tokyo"])
+    
+    Example: get_weather_batch(["London", "Paris", "Tokyo"])
+    """
+    if not cities:
+        raise ValueError("No cities given")
+    
+    return "\n".join(weather.fetch_many(cities))
+
 # WIKIPEDIA SEARCH TOOL
 
 @tool
@@ -80,11 +102,28 @@ def search_wikipedia(query: str) -> str:
     
     Example: search_wikipedia("Eiffel Tower")
     """
+    # Local store first (no network for titles seen before or imported)
+    store = wiki_store.get_wiki_store()
+    if store is not None:
+        summary = store.summary(query)
+        if summary is not None:
+            return summary
+        options = store.disambiguation(query)
+        if options is not None:
+            return f"Multiple results found. Please be more specific. Options: {', '.join(options[:5])}"
+    
+    import wikipedia
+    
     try:
-        result = wikipedia.summary(query, sentences=3)
-        return result
+        page = wikipedia.page(query)
+        if store is not None:
+            # The query becomes a redirect to the resolved title
+            store.add(page.title, page.summary, aliases=[query])
+        return wiki_store.first_sentences(page.summary, 3)
     
     except wikipedia.exceptions.DisambiguationError as e:
+        if store is not None:
+            store.add_disambiguation(query, e.options)
         return f"Multiple results found. Please be more specific. Options: {', '.join(e.options[:5])}"
     
     except wikipedia.exceptions.PageError:
@@ -107,9 +146,8 @@ def google_search(query: str) -> str:
     Example: google_search("Python tutorials")
     """
     try:
-        results = []
-        for url in search(query, num_results=5):
-            results.append(url)
+        # Cached, coalesced and rate limited (see web_search.py)
+        results = web_search.search(query)
         
         if not results:
             return f"No results found for '{query}'"
@@ -137,31 +175,37 @@ def web_scraper(url: str) -> str:
     Example: web_scraper("https://en.wikipedia.org/wiki/Python")
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-            element.decompose()
-        
-        # Get text
-        text = soup.get_text()
-        
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        text = '\n'.join(line for line in lines if line)
-        
-        # Limit to first 1000 characters
-        if len(text) > 1000:
-            text = text[:1000] + "..."
-        
-        return text
+        # Streams the page and stops once enough text is collected
+        return scraper.scrape(url)
     
     except Exception as e:
         raise ValueError(f"Failed to scrape URL: {str(e)}")
 
+def _scrape_many(urls: list[str]) -> str:
+    """
+    Fetches several web pages at once and extracts the text of each.
+    Use this instead of calling web_scraper repeatedly, e.g. to read the
+    result pages of a google_search.
+    
+    Args:
+        urls: The web page URLs to scrape (up to 10)
+    
+    Example: scrape_many(["https://example.com/a", "https://example.org/b"])
+    """
+    if not urls:
+        raise ValueError("No URLs to scrape")
+    return scraper.format_results(scraper.scrape_many(urls))
+
+async def _ascrape_many(urls: list[str]) -> str:
+    if not urls:
+        raise ValueError("No URLs to scrape")
+    return scraper.format_results(await scraper.ascrape_many(urls))
+
+# Async on the agent's event loop, a private loop when called from a tool thread
+scrape_many = StructuredTool.from_function(
+    func=_scrape_many, coroutine=_ascrape_many, name="scrape_many"
+)
+
 # EMAIL TOOL
 
 @tool
@@ -178,51 +222,61 @@ def send_email(to_email: str, subject: str, body: str) -> str:
     Example: send_email("user@example.com", "Test", "Hello World")
     """
     try:
-        from_email = os.getenv("EMAIL_ADDRESS")
-        password = os.getenv("EMAIL_PASSWORD")
-        
-        if not from_email or not password:
-            return "Email not configured. Set EMAIL_ADDRESS and EMAIL_PASSWORD in .env file"
-        
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+        error = outbox.configuration_error()
+        if error:
+            return error
         
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(from_email, password)
-        server.send_message(msg)
-        server.quit()
+        # Delivered in the background over a reused SMTP connection
+        message_id = outbox.get_outbox().send(to_email, subject, body)
         
-        return f"Email sent successfully to {to_email}"
+        return (f"Email to {to_email} queued for delivery (id {message_id}). "
+                f"Use email_status to check that it was sent.")
     
     except Exception as e:
         raise ValueError(f"Failed to send email: {str(e)}")
 
+@tool
+def email_status(message_id: str = "") -> str:
+    """
+    Check whether emails queued by send_email were delivered.
+    Use this when user asks if an email was sent.
+    
+    Args:
+        message_id: Id returned by send_email (empty for the most recent emails)
+    
+    Example: email_status("3f2a9c81d0b4")
+    """
+    mailbox = outbox.get_outbox()
+    if message_id:
+        status = mailbox.status(message_id.strip())
+        if status is None:
+            return f"No email with id '{message_id}'"
+        return outbox.describe(status)
+    
+    statuses = mailbox.recent(5)
+    if not statuses:
+        return "No emails have been sent"
+    return "\n".join(outbox.describe(status) for status in statuses)
+
 # SUMMARIZER TOOL
 
 @tool
-def summarize_text(text: str) -> str:
+def summarize_text(text: str, sentences: int = summarizer.SUMMARY_SENTENCES) -> str:
     """
     Summarize long text into key points.
     Use this to condense articles, documents, or long content.
     
     Args:
         text: The text to summarize
+        sentences: How many sentences the summary should have
     
     Example: summarize_text("Long article text here...")
     """
     try:
-        # Simple summarization: take first 3 sentences and last sentence
-        sentences = text.split('.')
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        if len(sentences) <= 3:
+        # Extractive: the most central sentences, ranked with TextRank
+        summary = summarizer.summarize(text, sentences=max(1, sentences))
+        if summary == text.strip():
             return text
-        
-        summary = '. '.join(sentences[:3] + [sentences[-1]]) + '.'
         return f"Summary: {summary}"
     
     except Exception as e:
@@ -248,17 +302,33 @@ class MemoryManager:
         - Stores memories as embeddings (vectors)
         - Persists to ./chroma_memory folder
         - Automatically loads existing memories on restart
+        
+        If CHROMA_SERVER_HOST is set, connects to a shared Chroma server
+        instead (multi-worker mode: one writer process for ./chroma_memory).
         """
+        import chromadb
+        from chromadb.config import Settings
         
-        # NEW: Create persistent ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
+        settings = Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
         )
         
+        server_host = os.getenv("CHROMA_SERVER_HOST")
+        if server_host:
+            # Shared Chroma HTTP server (see shared_services.py)
+            self.client = chromadb.HttpClient(
+                host=server_host,
+                port=int(os.getenv("CHROMA_SERVER_PORT", "8100")),
+                settings=settings
+            )
+        else:
+            # NEW: Create persistent ChromaDB client
+            self.client = chromadb.PersistentClient(
+                path=persist_directory,
+                settings=settings
+            )
+        
         # NEW: Get or create collection (like a table in a database)
         self.collection = self.client.get_or_create_collection(
             name="agent_memory",
@@ -374,8 +444,27 @@ class MemoryManager:
         )
         return count
 
-# NEW: Initialize global memory manager (singleton pattern)
-memory_manager = MemoryManager()
+# Global memory manager (singleton pattern), created on first use:
+# opening ChromaDB and the embedding stack is too slow to do at import.
+_memory_manager = None
+_memory_manager_lock = threading.Lock()
+
+def get_memory_manager() -> MemoryManager:
+    """Return the global MemoryManager, creating it on first call"""
+    global _memory_manager
+    
+    if _memory_manager is None:
+        with _memory_manager_lock:
+            if _memory_manager is None:
+                _memory_manager = MemoryManager()
+    
+    return _memory_manager
+
+def __getattr__(name):
+    # Keeps `from tools import memory_manager` working, lazily
+    if name == "memory_manager":
+        return get_memory_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # MEMORY TOOLS - LangChain Tool Wrappers
@@ -407,7 +496,7 @@ def store_memory(content: str, tags: str = "") -> str:
         if tags:
             metadata["tags"] = tags
         
-        memory_id = memory_manager.store(content, metadata)
+        memory_id = get_memory_manager().store(content, metadata)
         return f"✓ Memory stored successfully! I'll remember: '{content}'"
     
     except Exception as e:
@@ -434,7 +523,7 @@ def recall_memory(query: str, num_results: int = 3) -> str:
         - recall_memory("health information")
     """
     try:
-        memories = memory_manager.recall(query, num_results)
+        memories = get_memory_manager().recall(query, num_results)
         
         if not memories:
             return "No memories found related to your query."
@@ -466,7 +555,7 @@ def list_all_memories() -> str:
     Example: "Show me all my memories" or "What do you remember about me?"
     """
     try:
-        memories = memory_manager.get_all_memories()
+        memories = get_memory_manager().get_all_memories()
         
         if not memories:
             return "I don't have any memories stored yet."
@@ -494,7 +583,7 @@ def clear_all_memories() -> str:
     Example: "Forget everything" or "Clear all my memories"
     """
     try:
-        count = memory_manager.clear_all()
+        count = get_memory_manager().clear_all()
         return f"✓ Cleared {count} memories. My memory is now empty."
     
     except Exception as e:
@@ -505,10 +594,13 @@ ALL_TOOLS = [
     
     # calculator, 
     get_weather, 
+    get_weather_batch,
     search_wikipedia, 
     google_search, 
     web_scraper, 
+    scrape_many,
     send_email, 
+    email_status,
     summarize_text,
     
     #  Memory tools
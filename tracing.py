@@ -0,0 +1,199 @@
+"""
+Tracing - Structured spans per agent run (request -> LLM call -> tool -> MCP RPC)
+Finished traces go to an in-memory ring buffer and, optionally, a JSONL file.
+Replaces verbose=True console output for analysis; sampled to keep overhead low.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Settings
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))   # share of runs traced
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "1000"))    # traces kept in memory
+TRACE_FILE = os.getenv("TRACE_FILE", "")                           # JSONL output (optional)
+
+# Recent traces, newest last
+TRACES = deque(maxlen=TRACE_BUFFER_SIZE)
+_file_lock = threading.Lock()
+
+# Trace and span of the code running now (propagates into tasks and tool threads)
+current_trace = contextvars.ContextVar("current_trace", default=None)
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _size(value) -> int:
+    """Size of a payload in characters"""
+    return len(value) if isinstance(value, str) else len(str(value))
+
+
+class Trace(BaseCallbackHandler):
+    """
+    One traced agent run. Pass it as a callback: LLM and tool calls become
+    spans; other code adds spans with tracing.span().
+    """
+
+    # Only appends to lists and dicts, no need to hop to a thread
+    run_inline = True
+
+    def __init__(self, name: str, **attrs):
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.root = {"span_id": "root", "parent_id": None, "kind": "request",
+                     "name": name, "start_ms": 0.0, "duration_ms": None, "attrs": attrs}
+        self.spans = [self.root]
+        self._open = {}  # run id -> span
+        self._token = None
+
+    # SPANS
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._started) * 1000, 3)
+
+    def start_span(self, kind: str, name: str, parent_id: str = None, **attrs) -> dict:
+        span = {
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent_id or current_span.get() or "root",
+            "kind": kind,
+            "name": name,
+            "start_ms": self._elapsed_ms(),
+            "duration_ms": None,
+            "attrs": attrs,
+        }
+        self.spans.append(span)
+        return span
+
+    def end_span(self, span: dict, **attrs):
+        span["duration_ms"] = round(self._elapsed_ms() - span["start_ms"], 3)
+        span["attrs"].update(attrs)
+
+    # CALLBACKS
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        chars = sum(_size(m.content) for batch in messages for m in batch)
+        params = kwargs.get("invocation_params") or {}
+        name = params.get("model") or params.get("model_name") or (serialized or {}).get("name", "llm")
+        self._open[run_id] = self.start_span("llm", str(name), parent_id="root", input_chars=chars)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+
+        attrs = {"output_chars": 0, "tool_calls": 0}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                attrs["output_chars"] += _size(generation.text)
+                attrs["tool_calls"] += len(getattr(message, "tool_calls", None) or [])
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    attrs["input_tokens"] = usage.get("input_tokens", 0)
+                    attrs["output_tokens"] = usage.get("output_tokens", 0)
+        self.end_span(span, **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._open.pop(run_id, None)
+        if span is not None:
+            self.end_span(span, error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        span = self.start_span("tool", name, parent_id="root", input_chars=_size(input_str))
+        self._open[run_id] = span
+        # The tool body runs in a copy of this context: its MCP spans nest here
+        current_span.set(span["span_id"])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        span = self._open.pop(run_id, None)
+        if span is not None:
+            self.end_span(span, output_chars=_size(getattr(output, "content", output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        span = self._open.pop(run_id, None)
+        if span is not None:
+            self.end_span(span, error=str(error))
+
+    # LIFECYCLE
+
+    def start(self):
+        """Make this the current trace (for tracing.span() in this context)"""
+        self._token = current_trace.set(self)
+        return self
+
+    def finish(self, error: str = None):
+        """Close the root span and publish the trace"""
+        if self._token is not None:
+            try:
+                current_trace.reset(self._token)
+            except ValueError:
+                # Finished from another context (e.g. a stream closed on disconnect)
+                pass
+
+        self.end_span(self.root, **({"error": error} if error else {}))
+        record = self.to_dict()
+        TRACES.append(record)
+
+        if TRACE_FILE:
+            line = json.dumps(record, default=str)
+            with _file_lock, open(TRACE_FILE, "a") as f:
+                f.write(line + "\n")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=str(exc) if exc is not None else None)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration_ms": self.root["duration_ms"],
+            "spans": self.spans,
+        }
+
+
+def start_trace(name: str, **attrs):
+    """A new Trace if tracing is on and this run is sampled, else None"""
+    if not TRACING_ENABLED or random.random() >= TRACE_SAMPLE_RATE:
+        return None
+    return Trace(name, **attrs)
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """Record a span in the current trace (no-op when the run isn't traced)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    record = trace.start_span(kind, name, **attrs)
+    token = current_span.set(record["span_id"])
+    try:
+        yield record
+    except BaseException as e:
+        record["attrs"]["error"] = str(e) or type(e).__name__
+        raise
+    finally:
+        current_span.reset(token)
+        trace.end_span(record)
+
+
+def recent_traces(limit: int = 20) -> list:
+    """Newest traces first"""
+    return list(TRACES)[-limit:][::-1]
+
+
+def get_trace(trace_id: str):
+    return next((t for t in TRACES if t["trace_id"] == trace_id), None)
@@ -0,0 +1,209 @@
+"""
+Weather - wttr.in lookups shared by the get_weather tool and the MCP weather server
+Results are cached per normalized city name in a SQLite file, so API
+workers and the MCP weather server (a separate process) reuse each other's
+lookups; concurrent lookups of the same city in a process share one request.
+Batch helpers fetch many cities at once.
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import quote
+import http_client
+from ttl_cache import TTLCache
+
+# Settings
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))     # seconds, 0 = off
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
+WEATHER_BATCH_MAX = int(os.getenv("WEATHER_BATCH_MAX", "10"))        # cities per batch call
+WEATHER_CACHE_PATH = os.getenv("WEATHER_CACHE_PATH", "./weather_cache.sqlite")  # "" = per process
+WEATHER_URL = os.getenv("WEATHER_URL", "http://wttr.in/{city}?format=%C+%t")
+
+# Lookups in progress: normalized city -> Future (sync) / Task (async)
+_inflight = {}
+_inflight_lock = threading.Lock()
+_async_inflight = {}
+
+# Threads for sync batch lookups
+_batch_pool = ThreadPoolExecutor(max_workers=WEATHER_BATCH_MAX, thread_name_prefix="weather")
+
+
+class SharedCache:
+    """
+    TTL cache in a SQLite file, shared by every process on the host.
+    Same get / set interface as TTLCache; expired and least recently
+    written entries past max_size are dropped on write.
+    """
+
+    def __init__(self, path: str = WEATHER_CACHE_PATH, max_size: int = WEATHER_CACHE_SIZE,
+                 default_ttl: float = WEATHER_CACHE_TTL):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS weather_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS weather_cache_expiry ON weather_cache (expires_at);
+        """)
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached value, or None if missing / expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM weather_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO weather_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl)
+            )
+            self._conn.execute("DELETE FROM weather_cache WHERE expires_at <= ?", (now,))
+            # Rows expiring first were written first (one TTL for all)
+            self._conn.execute(
+                "DELETE FROM weather_cache WHERE key IN (SELECT key FROM weather_cache "
+                "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_size,)
+            )
+            self._conn.commit()
+
+
+# Conditions by normalized city name, shared across processes (or, with
+# WEATHER_CACHE_PATH="", by the callers in this process only); opened on first use
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SharedCache() if WEATHER_CACHE_PATH else TTLCache(
+                    max_size=WEATHER_CACHE_SIZE, default_ttl=WEATHER_CACHE_TTL)
+    return _cache
+
+
+def normalize_city(city: str) -> str:
+    """Cache key for a city: trimmed, single spaces, case-insensitive"""
+    return " ".join(city.split()).casefold()
+
+
+def format_report(city: str, conditions: str) -> str:
+    return f"Weather in {city}: {conditions}"
+
+
+def _url(city: str) -> str:
+    return WEATHER_URL.format(city=quote(" ".join(city.split())))
+
+
+# SYNC
+
+def fetch_conditions(city: str) -> str:
+    """Current conditions (e.g. "Sunny +21°C"), from the cache when fresh"""
+    key = normalize_city(city)
+    conditions = get_cache().get(key)
+    if conditions is not None:
+        return conditions
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+
+    # Someone is already fetching this city: wait for their result
+    if not owner:
+        return future.result()
+
+    try:
+        response = http_client.get(_url(city))
+        response.raise_for_status()
+        conditions = response.text.strip()
+        get_cache().set(key, conditions)
+        future.set_result(conditions)
+        return conditions
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _not_fetched(cities) -> list:
+    """A closing line naming the cities past WEATHER_BATCH_MAX, which are not fetched"""
+    rest = list(cities[WEATHER_BATCH_MAX:])
+    if not rest:
+        return []
+    return [f"{len(rest)} cities not fetched (max {WEATHER_BATCH_MAX} per call): {', '.join(rest)}"]
+
+
+def fetch_many(cities) -> list:
+    """
+    Reports for several cities, fetched concurrently, in the given order;
+    at most WEATHER_BATCH_MAX, with a last line naming any left out
+    """
+    def report(city):
+        try:
+            return format_report(city, fetch_conditions(city))
+        except Exception as e:
+            return format_report(city, f"unavailable ({e})")
+
+    return list(_batch_pool.map(report, cities[:WEATHER_BATCH_MAX])) + _not_fetched(cities)
+
+
+# ASYNC
+
+async def afetch_conditions(city: str) -> str:
+    """Async fetch_conditions(); same cache, concurrent callers share a task"""
+    key = normalize_city(city)
+    conditions = get_cache().get(key)
+    if conditions is not None:
+        return conditions
+
+    loop = asyncio.get_running_loop()
+    task = _async_inflight.get((loop, key))
+    if task is None:
+        task = loop.create_task(_adownload(key, city))
+        _async_inflight[(loop, key)] = task
+        task.add_done_callback(lambda _: _async_inflight.pop((loop, key), None))
+
+    # Shielded: one caller giving up doesn't cancel the others' lookup
+    return await asyncio.shield(task)
+
+
+async def _adownload(key: str, city: str) -> str:
+    response = await http_client.aget(_url(city))
+    response.raise_for_status()
+    conditions = response.text.strip()
+    get_cache().set(key, conditions)
+    return conditions
+
+
+async def afetch_many(cities) -> list:
+    """Async fetch_many()"""
+    async def report(city):
+        try:
+            return format_report(city, await afetch_conditions(city))
+        except Exception as e:
+            return format_report(city, f"unavailable ({e})")
+
+    reports = await asyncio.gather(*[report(city) for city in cities[:WEATHER_BATCH_MAX]])
+    return reports + _not_fetched(cities)
@@ -0,0 +1,234 @@
+"""
+Web Search - Backends for the google_search tool, selected with SEARCH_BACKEND
+google: googlesearch scraping (default)
+stub:   local index (SEARCH_STUB_INDEX) or generated URLs, for benchmarks
+        and offline runs
+Results are cached per normalized query, identical concurrent queries share
+one backend call, and backend calls go through a token bucket shared by
+all threads and worker processes (SQLite), so load doesn't get us blocked.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import Future
+from metrics import Counter
+from ttl_cache import TTLCache
+
+# Settings
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "google")
+SEARCH_NUM_RESULTS = int(os.getenv("SEARCH_NUM_RESULTS", "5"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))     # seconds, 0 = off
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+SEARCH_RATE = float(os.getenv("SEARCH_RATE", "0.5"))               # backend calls per second, 0 = unlimited
+SEARCH_BURST = float(os.getenv("SEARCH_BURST", "3"))
+SEARCH_RATE_WAIT = float(os.getenv("SEARCH_RATE_WAIT", "10"))      # max seconds to wait for a token
+SEARCH_RATE_PATH = os.getenv("SEARCH_RATE_PATH", "./search_rate.sqlite")
+
+# Stub backend
+SEARCH_STUB_INDEX = os.getenv("SEARCH_STUB_INDEX", "")             # JSON: [{"url": ..., "text": ...}]
+SEARCH_STUB_LATENCY = float(os.getenv("SEARCH_STUB_LATENCY", "0"))  # seconds per search
+
+# Metrics
+SEARCH_REQUESTS = Counter("web_search_requests_total",
+                          "google_search lookups, by how they were answered", ["result"])
+
+# Results by (backend, normalized query, count)
+CACHE = TTLCache(max_size=SEARCH_CACHE_SIZE, default_ttl=SEARCH_CACHE_TTL)
+
+# Searches in progress: cache key -> Future
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+_WORD = re.compile(r"\w+")
+
+
+class RateLimited(ValueError):
+    """No search token became available within SEARCH_RATE_WAIT"""
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: trimmed, single spaces, case-insensitive"""
+    return " ".join(query.split()).casefold()
+
+
+# RATE LIMIT
+
+class TokenBucket:
+    """
+    Token bucket kept in a SQLite row, so every thread and every worker
+    process on the host draws from the same bucket.
+    """
+
+    def __init__(self, name: str, rate: float = SEARCH_RATE, burst: float = SEARCH_BURST,
+                 path: str = SEARCH_RATE_PATH):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+
+    def _take(self) -> float:
+        """Take a token if there is one -> 0, else seconds until the next one"""
+        with self._lock:
+            # IMMEDIATE: the write lock is held from the read, across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens = self.burst if row is None else min(
+                    self.burst, row[0] + max(0.0, now - row[1]) * self.rate
+                )
+
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, timeout: float = SEARCH_RATE_WAIT) -> bool:
+        """Wait for a token; False if none is free within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+def get_bucket():
+    """Shared search token bucket, or None when SEARCH_RATE is 0"""
+    global _bucket
+
+    if SEARCH_RATE > 0 and _bucket is None:
+        with _bucket_lock:
+            if _bucket is None:
+                _bucket = TokenBucket("search")
+
+    return _bucket
+
+
+# BACKENDS
+
+BACKENDS = {}
+
+def register_backend(name: str):
+    """Decorator: register a function (query, num_results) -> [url] under a name"""
+    def decorate(search):
+        BACKENDS[name] = search
+        return search
+    return decorate
+
+
+@register_backend("google")
+def google_backend(query: str, num_results: int) -> list:
+    from googlesearch import search
+    return list(search(query, num_results=num_results))
+
+
+_stub_index = None
+
+def _load_stub_index() -> list:
+    global _stub_index
+
+    if _stub_index is None:
+        if SEARCH_STUB_INDEX:
+            with open(SEARCH_STUB_INDEX) as f:
+                documents = json.load(f)
+        else:
+            documents = []
+        _stub_index = [(doc["url"], set(_WORD.findall(doc.get("text", doc["url"]).casefold())))
+                       for doc in documents]
+    return _stub_index
+
+
+@register_backend("stub")
+def stub_backend(query: str, num_results: int) -> list:
+    """URLs of the indexed documents sharing the most words with the query"""
+    if SEARCH_STUB_LATENCY:
+        time.sleep(SEARCH_STUB_LATENCY)
+
+    index = _load_stub_index()
+    if not index:
+        # No index: stable made-up URLs per query
+        slug = "-".join(_WORD.findall(query.casefold())) or "query"
+        return [f"https://example.com/{slug}/{i}" for i in range(1, num_results + 1)]
+
+    words = set(_WORD.findall(query.casefold()))
+    scored = sorted(((len(words & doc_words), url) for url, doc_words in index),
+                    key=lambda pair: -pair[0])
+    return [url for score, url in scored if score][:num_results]
+
+
+# SEARCH
+
+def search(query: str, num_results: int = SEARCH_NUM_RESULTS, backend: str = None) -> list:
+    """Result URLs for a query: cached, coalesced and rate limited"""
+    backend = backend or SEARCH_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown search backend '{backend}'. Available: {', '.join(BACKENDS)}")
+
+    key = (backend, normalize_query(query), num_results)
+    results = CACHE.get(key)
+    if results is not None:
+        SEARCH_REQUESTS.inc("cached")
+        return results
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+
+    # The same search is already running: share its result
+    if not owner:
+        SEARCH_REQUESTS.inc("coalesced")
+        return future.result()
+
+    try:
+        bucket = get_bucket()
+        if bucket is not None and not bucket.acquire():
+            SEARCH_REQUESTS.inc("rate_limited")
+            raise RateLimited("Search rate limit reached, try again in a few seconds")
+
+        SEARCH_REQUESTS.inc("backend")
+        results = BACKENDS[backend](query, num_results)
+        CACHE.set(key, results)
+        future.set_result(results)
+        return results
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
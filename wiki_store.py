@@ -0,0 +1,311 @@
+"""
+Wiki Store - Local Wikipedia titles and summaries (SQLite + FTS5)
+search_wikipedia looks here first: exact titles, known redirects / earlier
+queries, then a full-text match on titles. Filled on demand from the
+Wikipedia API, or in bulk from an abstracts dump:
+
+    python wiki_store.py import enwiki-latest-abstract.xml.gz
+"""
+
+import os
+import re
+import sys
+import bz2
+import gzip
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+import xml.etree.ElementTree as ET
+from itertools import islice
+from metrics import Counter
+from summarizer import split_sentences
+
+# Settings
+WIKI_STORE_ENABLED = os.getenv("WIKI_STORE_ENABLED", "true").lower() == "true"
+WIKI_STORE_PATH = os.getenv("WIKI_STORE_PATH", "./wiki_store.sqlite")
+WIKI_STORE_TTL = float(os.getenv("WIKI_STORE_TTL", str(30 * 86400)))  # seconds, 0 = never stale
+
+# Metrics
+WIKI_STORE_LOOKUPS = Counter("wiki_store_lookups_total",
+                             "search_wikipedia local store lookups, by result", ["result"])
+
+MAX_REDIRECT_HOPS = 5
+IMPORT_BATCH = 10000
+FTS_CANDIDATES = 20     # full-text hits checked per lookup
+
+_REDIRECT = re.compile(r"^#REDIRECT\s*\[\[([^\]|#]+)", re.I)
+_WORD = re.compile(r"\w+")
+
+
+def normalize_title(title: str) -> str:
+    """Lookup key: Unicode NFC, underscores as spaces, no section, single spaces, casefolded"""
+    title = unicodedata.normalize("NFC", title).replace("_", " ").split("#")[0]
+    return " ".join(title.split()).casefold()
+
+
+def first_sentences(text: str, sentences: int) -> str:
+    """The first sentences of a summary (like the API's exsentences)"""
+    return " ".join(islice(split_sentences(text.strip()), sentences))
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall(text.casefold()))
+
+
+def _fts_query(query: str):
+    """FTS5 query matching titles that contain every word of the query"""
+    words = sorted(_words(query))
+    if not words:
+        return None
+    return " AND ".join(f'title:"{word}"' for word in words)
+
+
+def _base_words(title: str) -> set:
+    """Words of a title without its parenthesized qualifier"""
+    return _words(re.sub(r"\(.*?\)", " ", title))
+
+
+def _title_matches(query: str, title: str) -> bool:
+    """
+    A full-text hit is only used when the title says no more than the query,
+    and a parenthesized qualifier is only accepted when the query names it:
+    "python programming" matches "Python (programming language)", but
+    "python" doesn't (it is ambiguous), and "Paris" doesn't match "Paris Hilton"
+    """
+    words = _words(query)
+    qualifier = _words(title) - _base_words(title)
+    if qualifier and not qualifier & words:
+        return False
+    return _base_words(title) <= words <= _words(title)
+
+
+class WikiStore:
+    """
+    Titles, summaries, redirects and disambiguation options in a local SQLite file.
+
+    - articles: normalized title -> title, summary (and an FTS5 index on both)
+    - redirects: normalized alias (redirect page or earlier query) -> article key
+    - disambiguations: normalized query -> options, so ambiguous queries
+      don't cost a round trip every time
+    """
+
+    def __init__(self, path: str = WIKI_STORE_PATH, ttl: float = WIKI_STORE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                source TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS redirects (
+                key TEXT PRIMARY KEY,
+                target TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS disambiguations (
+                key TEXT PRIMARY KEY,
+                options TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary, content='articles', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+                INSERT INTO articles_fts (rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END;
+        """)
+        self._conn.commit()
+
+    def _fresh(self, fetched_at: float) -> bool:
+        return not self.ttl or time.time() - fetched_at < self.ttl
+
+    # LOOKUP
+
+    def _resolve(self, key: str) -> str:
+        """Follow redirects from a normalized title to an article key"""
+        for _ in range(MAX_REDIRECT_HOPS):
+            row = self._conn.execute(
+                "SELECT target FROM redirects WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] == key:
+                break
+            key = row[0]
+        return key
+
+    def find(self, query: str):
+        """(title, summary) for a query, or None (unknown or stale)"""
+        with self._lock:
+            key = self._resolve(normalize_title(query))
+            row = self._conn.execute(
+                "SELECT title, summary, fetched_at FROM articles WHERE key = ?", (key,)
+            ).fetchone()
+
+            # A query known to be ambiguous is never answered by a guess
+            ambiguous = row is None and self._conn.execute(
+                "SELECT 1 FROM disambiguations WHERE key = ?", (normalize_title(query),)
+            ).fetchone()
+
+            if row is None and not ambiguous:
+                # Full-text match: titles containing every word of the query
+                match = _fts_query(query)
+                candidates = self._conn.execute(
+                    "SELECT a.title, a.summary, a.fetched_at FROM articles_fts "
+                    "JOIN articles a ON a.id = articles_fts.rowid "
+                    "WHERE articles_fts MATCH ? ORDER BY rank LIMIT ?", (match, FTS_CANDIDATES)
+                ).fetchall() if match else []
+                row = next((c for c in candidates if _title_matches(query, c[0])), None)
+
+        if row is None or not self._fresh(row[2]):
+            return None
+        return row[0], row[1]
+
+    def summary(self, query: str, sentences: int = 3):
+        """First sentences of the stored summary for a query, or None"""
+        found = self.find(query)
+        WIKI_STORE_LOOKUPS.inc("hit" if found else "miss")
+        return first_sentences(found[1], sentences) if found else None
+
+    def disambiguation(self, query: str):
+        """Stored options for an ambiguous query, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT options, fetched_at FROM disambiguations WHERE key = ?",
+                (normalize_title(query),)
+            ).fetchone()
+        if row is None or not self._fresh(row[1]):
+            return None
+        WIKI_STORE_LOOKUPS.inc("disambiguation")
+        return json.loads(row[0])
+
+    # STORE
+
+    def add(self, title: str, summary: str, aliases=(), source: str = "api"):
+        """Store an article, and the queries / redirects that led to it"""
+        key = normalize_title(title)
+        with self._lock:
+            self._upsert(key, title, summary, source, time.time())
+            for alias in aliases:
+                alias_key = normalize_title(alias)
+                if alias_key != key:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO redirects (key, target) VALUES (?, ?)",
+                        (alias_key, key)
+                    )
+                self._conn.execute("DELETE FROM disambiguations WHERE key = ?", (alias_key,))
+            self._conn.commit()
+
+    def _upsert(self, key, title, summary, source, fetched_at):
+        self._conn.execute(
+            "INSERT INTO articles (key, title, summary, source, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "title = excluded.title, summary = excluded.summary, "
+            "source = excluded.source, fetched_at = excluded.fetched_at",
+            (key, title, summary, source, fetched_at)
+        )
+
+    def add_disambiguation(self, query: str, options):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO disambiguations (key, options, fetched_at) "
+                "VALUES (?, ?, ?)",
+                (normalize_title(query), json.dumps(list(options)), time.time())
+            )
+            self._conn.commit()
+
+    # BULK IMPORT
+
+    def import_abstracts(self, path: str) -> tuple:
+        """
+        Load a Wikipedia abstracts dump (enwiki-*-abstract*.xml, optionally
+        .gz / .bz2): one <doc> with <title> and <abstract> per article,
+        "#REDIRECT [[Target]]" abstracts become redirects.
+        Returns (articles, redirects) imported.
+        """
+        opener = gzip.open if path.endswith(".gz") else bz2.open if path.endswith(".bz2") else open
+        articles = redirects = 0
+        now = time.time()
+
+        with opener(path, "rb") as f, self._lock:
+            root = None
+            for event, element in ET.iterparse(f, events=("start", "end")):
+                if root is None:
+                    root = element
+                if event != "end" or element.tag != "doc":
+                    continue
+
+                title = (element.findtext("title") or "").removeprefix("Wikipedia: ").strip()
+                abstract = (element.findtext("abstract") or "").strip()
+                # Drop parsed docs so memory stays flat on multi-GB dumps
+                root.clear()
+                if not title or not abstract:
+                    continue
+
+                redirect = _REDIRECT.match(abstract)
+                if redirect:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO redirects (key, target) VALUES (?, ?)",
+                        (normalize_title(title), normalize_title(redirect.group(1)))
+                    )
+                    redirects += 1
+                else:
+                    self._upsert(normalize_title(title), title, abstract, "dump", now)
+                    articles += 1
+
+                if (articles + redirects) % IMPORT_BATCH == 0:
+                    self._conn.commit()
+
+            self._conn.commit()
+
+        return articles, redirects
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("articles", "redirects", "disambiguations")
+            }
+
+
+_wiki_store = None
+_wiki_store_lock = threading.Lock()
+
+def get_wiki_store():
+    """Shared store instance if WIKI_STORE_ENABLED, else None"""
+    global _wiki_store
+
+    if WIKI_STORE_ENABLED and _wiki_store is None:
+        with _wiki_store_lock:
+            if _wiki_store is None:
+                _wiki_store = WikiStore()
+
+    return _wiki_store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "import":
+        print("Usage: python wiki_store.py import <enwiki-latest-abstract.xml[.gz|.bz2]>")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    store = WikiStore()
+    articles, redirects = store.import_abstracts(sys.argv[2])
+    print(f"✓ Imported {articles} articles and {redirects} redirects "
+          f"in {time.perf_counter() - started:.1f}s into {WIKI_STORE_PATH}")